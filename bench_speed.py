@@ -0,0 +1,223 @@
+"""게이트웨이 이벤트 처리량 / 지연 벤치마크
+
+기본 asyncio + json 과 uvloop / orjson 조합을 같은 페이로드 흐름으로 비교함.
+로컬 TCP 연결로 길이 접두 프레임을 보내고, 받는 쪽에서 디코딩 후
+discord.py처럼 이벤트마다 태스크를 만들어 처리함 (zlib 압축 해제는 제외).
+
+    python bench_speed.py                  # 합성 페이로드
+    python bench_speed.py gateway.jsonl    # GATEWAY_RECORD_FILE 로 기록한 페이로드
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import struct
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+FRAME_HEADER = struct.Struct("!I")
+DRAIN_EVERY = 64
+
+
+# ---------- 페이로드 ----------
+
+
+def snowflake() -> str:
+    return str(random.randrange(10**17, 10**19))
+
+
+def fake_user() -> dict:
+    return {
+        "id": snowflake(),
+        "username": f"user{random.randrange(100000)}",
+        "global_name": None,
+        "avatar": "%032x" % random.getrandbits(128),
+        "discriminator": "0",
+        "public_flags": 0,
+    }
+
+
+def fake_member(guild_id: str) -> dict:
+    return {
+        "guild_id": guild_id,
+        "user": fake_user(),
+        "nick": f"[Rank] Player{random.randrange(100000)}",
+        "roles": [snowflake() for _ in range(random.randrange(1, 8))],
+        "joined_at": "2024-01-01T00:00:00.000000+00:00",
+        "premium_since": None,
+        "deaf": False,
+        "mute": False,
+        "pending": False,
+        "flags": 0,
+    }
+
+
+def synthetic_payloads(count: int) -> list[str]:
+    """실제 서버에서 많이 오는 이벤트 비율을 흉내 낸 합성 페이로드"""
+    guild_id = snowflake()
+    payloads = []
+    for seq in range(1, count + 1):
+        kind = random.random()
+        if kind < 0.45:
+            t, d = "PRESENCE_UPDATE", {
+                "user": {"id": snowflake()},
+                "guild_id": guild_id,
+                "status": random.choice(["online", "idle", "dnd"]),
+                "activities": [{"name": "Roblox", "type": 0, "created_at": 1700000000000}],
+                "client_status": {"desktop": "online"},
+            }
+        elif kind < 0.75:
+            t, d = "MESSAGE_CREATE", {
+                "id": snowflake(),
+                "channel_id": snowflake(),
+                "guild_id": guild_id,
+                "author": fake_user(),
+                "member": fake_member(guild_id),
+                "content": "안녕하세요 " * random.randrange(1, 30),
+                "timestamp": "2024-01-01T00:00:00.000000+00:00",
+                "embeds": [],
+                "attachments": [],
+                "mentions": [],
+                "mention_roles": [],
+                "type": 0,
+            }
+        elif kind < 0.95:
+            t, d = "GUILD_MEMBER_UPDATE", fake_member(guild_id)
+        else:
+            t, d = "INTERACTION_CREATE", {
+                "id": snowflake(),
+                "application_id": snowflake(),
+                "type": 2,
+                "guild_id": guild_id,
+                "channel_id": snowflake(),
+                "member": fake_member(guild_id),
+                "token": "x" * 200,
+                "data": {"id": snowflake(), "name": "인증", "type": 1,
+                         "options": [{"name": "로블닉", "type": 3, "value": "Player1"}]},
+            }
+        payloads.append(json.dumps({"op": 0, "s": seq, "t": t, "d": d}, ensure_ascii=False))
+    return payloads
+
+
+def load_payloads(path: str) -> list[str]:
+    with open(path, encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+
+# ---------- 측정 ----------
+
+
+async def run_stream(frames: list[bytes], loads) -> tuple[float, list[float]]:
+    """프레임을 모두 보내고 처리 완료까지 걸린 시간과 이벤트별 지연(초)"""
+    sent = [0.0] * len(frames)
+    latencies = [0.0] * len(frames)
+    done = asyncio.Event()
+    remaining = len(frames)
+
+    async def handle(index: int, payload: dict) -> None:
+        nonlocal remaining
+        # 이벤트 핸들러가 하는 정도의 가벼운 접근
+        data = payload.get("d") or {}
+        data.get("guild_id")
+        data.get("member") or data.get("user")
+        latencies[index] = time.perf_counter() - sent[index]
+        remaining -= 1
+        if remaining == 0:
+            done.set()
+
+    async def serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        for i, frame in enumerate(frames):
+            sent[i] = time.perf_counter()
+            writer.write(frame)
+            if i % DRAIN_EVERY == 0:
+                await writer.drain()
+        await writer.drain()
+
+    server = await asyncio.start_server(serve, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    tasks = set()
+
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for i in range(len(frames)):
+        (size,) = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+        payload = loads(await reader.readexactly(size))
+        task = asyncio.create_task(handle(i, payload))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    await done.wait()
+    elapsed = time.perf_counter() - start
+
+    writer.close()
+    server.close()
+    await server.wait_closed()
+    return elapsed, latencies
+
+
+def benchmark(frames: list[bytes], loop_factory, loads, repeat: int) -> dict:
+    runs = []
+    for _ in range(repeat):
+        with asyncio.Runner(loop_factory=loop_factory) as runner:
+            runs.append(runner.run(run_stream(frames, loads)))
+    elapsed, latencies = sorted(runs, key=lambda r: r[0])[len(runs) // 2]  # 중앙값 실행
+    latencies.sort()
+    return {
+        "events_per_s": len(frames) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("payloads", nargs="?", help="기록된 게이트웨이 페이로드 (JSONL)")
+    parser.add_argument("--events", type=int, default=50000, help="합성 페이로드 수")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.payloads) if args.payloads else synthetic_payloads(args.events)
+    encoded = [p.encode("utf-8") for p in payloads]
+    frames = [FRAME_HEADER.pack(len(p)) + p for p in encoded]
+    print(
+        f"페이로드 {len(frames)}개, 평균 {statistics.mean(map(len, encoded)):.0f} bytes "
+        f"({'기록' if args.payloads else '합성'})\n"
+    )
+
+    loops = [("asyncio", asyncio.new_event_loop)]
+    if uvloop is not None:
+        loops.append(("uvloop", uvloop.new_event_loop))
+    decoders = [("json", json.loads)]
+    if orjson is not None:
+        decoders.append(("orjson", orjson.loads))
+
+    print(f"{'loop':<8} {'json':<7} {'events/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    baseline = None
+    for loop_name, loop_factory in loops:
+        for decoder_name, loads in decoders:
+            result = benchmark(frames, loop_factory, loads, args.repeat)
+            baseline = baseline or result["events_per_s"]
+            print(
+                f"{loop_name:<8} {decoder_name:<7} {result['events_per_s']:>10.0f} "
+                f"{result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f}"
+                f"  (x{result['events_per_s'] / baseline:.2f})"
+            )
+
+    missing = [name for name, mod in (("uvloop", uvloop), ("orjson", orjson)) if mod is None]
+    if missing:
+        print(f"\n설치되지 않아 제외: {', '.join(missing)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,31 @@
 import os
 import re  
+import io
+import csv
+import gzip
+import json
+import math
+import sys
+import queue
+import logging
+import logging.handlers
 import sqlite3
 import random
 import string
 import shutil
+import time
+import asyncio
+import bisect
+import atexit
+import threading
+import traceback
+import contextlib
+import contextvars
+import functools
+import tracemalloc
+import tempfile
+import zlib
+from collections import Counter, OrderedDict, deque
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
@@ -13,6 +35,22 @@ from discord import app_commands
 from discord.ext import commands, tasks
 from dotenv import load_dotenv
 
+# 선택 설치 라이브러리 (SPEED_PROFILE=1 일 때만 사용, 없으면 기본 구현으로 동작)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+try:
+    import aiodns  # aiohttp.AsyncResolver가 사용
+except ImportError:
+    aiodns = None
+
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 env_path = os.path.join(BASE_DIR, ".env")
@@ -22,6 +60,12 @@ TOKEN = str(os.getenv("DISCORD_TOKEN"))
 GUILD_ID = int(os.getenv("GUILD_ID", "0"))
 OWNER_ID = int(os.getenv("OWNER_ID", "0"))
 
+SPEED_PROFILE = os.getenv("SPEED_PROFILE", "0") == "1"
+
+# 벤치마크용 게이트웨이 수신 기록 (메시지 내용 등 개인정보가 포함되므로 필요할 때만)
+GATEWAY_RECORD_FILE = os.getenv("GATEWAY_RECORD_FILE")
+GATEWAY_RECORD_LIMIT = int(os.getenv("GATEWAY_RECORD_LIMIT", "20000"))
+
 CREATOR_ROBLOX_NICK = "DeSky_Lunarx"
 CREATOR_ROBLOX_REAL = "Sky_Lunarx"
 CREATOR_DISCORD_NAME = "Lunar"
@@ -29,16 +73,315 @@ CREATOR_DISCORD_NAME = "Lunar"
 if not TOKEN:
     raise RuntimeError("DISCORD_TOKEN이 .env에 설정되어 있지 않습니다.")
 
+# ---------- 트레이싱 ----------
+
+
+class Trace:
+    """인터랙션 하나의 처리 과정 (DB, Roblox, 디스코드 REST 구간 포함)"""
+
+    def __init__(self, name: str, **attrs):
+        self.trace_id = os.urandom(8).hex()
+        self.name = name
+        self.attrs = attrs
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration_ms = 0.0
+        self.error: Optional[str] = None
+        self.spans: list[dict] = []
+
+
+current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar(
+    "current_trace", default=None
+)
+current_span: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+@contextlib.contextmanager
+def span(name: str, **attrs):
+    """현재 트레이스에 구간 기록 (트레이스가 없으면 아무것도 하지 않음)"""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    parent = current_span.get()
+    token = current_span.set(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        current_span.reset(token)
+        trace.spans.append(
+            {
+                "name": name,
+                "parent": parent,
+                "offset_ms": round((start - trace.start) * 1000, 3),
+                "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                **attrs,
+            }
+        )
+
+
+def sql_shape(sql: str) -> str:
+    return " ".join(sql.split())
+
+
+# 이 시간 이상 걸린 쿼리는 SQL 형태마다 한 번 EXPLAIN QUERY PLAN 기록
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "50"))
+
+# 정규화된 SQL → [실행 횟수, 총 시간(초), 최대 시간(초)]
+query_stats: dict[str, list] = {}
+# 정규화된 SQL → (실행 계획 줄, 인덱스 없는 전체 스캔 여부)
+query_plans: dict[str, tuple[list[str], bool]] = {}
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """공백을 합치고 f-string으로 들어간 숫자도 ?로 바꿔 같은 형태끼리 묶음"""
+    return re.sub(r"\b\d+\b", "?", sql_shape(sql))
+
+
+def capture_query_plan(conn: sqlite3.Connection, shape: str, sql: str, parameters) -> None:
+    try:
+        # 통계에 다시 잡히지 않도록 기본 커서로 실행
+        rows = sqlite3.Cursor(conn).execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+    except sqlite3.Error as e:
+        query_plans[shape] = ([f"EXPLAIN 실패: {e}"], False)
+        return
+    details = [row[3] for row in rows]
+    full_scan = any(re.fullmatch(r"SCAN \w+", detail) for detail in details)
+    query_plans[shape] = (details, full_scan)
+    db_log.warning(
+        f"느린 쿼리{' (전체 스캔)' if full_scan else ''}: {shape} → {' / '.join(details)}"
+    )
+
+
+def check_slow_query(
+    cursor: sqlite3.Cursor, shape: str, sql: str, parameters, elapsed: float
+) -> None:
+    if (
+        elapsed * 1000 >= SLOW_QUERY_MS
+        and parameters is not None
+        and shape not in query_plans
+        and shape.split(" ", 1)[0].upper() in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+    ):
+        capture_query_plan(cursor.connection, shape, sql, parameters)
+
+
+def record_query(
+    cursor: sqlite3.Cursor, sql: str, parameters, elapsed: float
+) -> tuple[str, list]:
+    """실행 1회 기록 → (정규화된 SQL, 이후 fetch 시간을 더할 통계 항목)"""
+    shape = normalize_sql(sql)
+    stat = query_stats.get(shape)
+    if stat is None:
+        stat = query_stats[shape] = [0, 0.0, 0.0]
+    stat[0] += 1
+    stat[1] += elapsed
+    stat[2] = max(stat[2], elapsed)
+    check_slow_query(cursor, shape, sql, parameters, elapsed)
+    return shape, stat
+
+
+class TracedCursor(sqlite3.Cursor):
+    """execute와 fetch*/반복 시간을 합쳐 문장별로 기록
+
+    sqlite3는 execute에서 첫 행만 읽고 나머지는 fetch 때 읽으므로
+    execute만 재면 여러 행을 읽는 쿼리가 거의 0으로 보임"""
+
+    # 마지막 execute: [sql, parameters, 정규화된 SQL, 통계 항목, 누적 시간(초), 트레이스 구간]
+    last_query: Optional[list] = None
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        trace = current_trace.get()
+        try:
+            if trace is None:
+                return super().execute(sql, parameters)
+            with span("db", sql=sql_shape(sql)):
+                return super().execute(sql, parameters)
+        finally:
+            elapsed = time.perf_counter() - start
+            shape, stat = record_query(self, sql, parameters, elapsed)
+            db_span = trace.spans[-1] if trace is not None and trace.spans else None
+            self.last_query = [sql, parameters, shape, stat, elapsed, db_span]
+
+    def executemany(self, sql, seq_of_parameters):
+        self.last_query = None
+        start = time.perf_counter()
+        try:
+            if current_trace.get() is None:
+                return super().executemany(sql, seq_of_parameters)
+            with span("db", sql=sql_shape(sql)):
+                return super().executemany(sql, seq_of_parameters)
+        finally:
+            # 파라미터가 이미 소비됐을 수 있으므로 실행 계획은 기록하지 않음
+            record_query(self, sql, None, time.perf_counter() - start)
+
+    def add_fetch_time(self, elapsed: float) -> None:
+        query = self.last_query
+        if query is None:
+            return
+        sql, parameters, shape, stat, total, db_span = query
+        total += elapsed
+        query[4] = total
+        stat[1] += elapsed
+        if total > stat[2]:
+            stat[2] = total
+            check_slow_query(self, shape, sql, parameters, total)
+        if db_span is not None:
+            db_span["duration_ms"] = round(db_span["duration_ms"] + elapsed * 1000, 3)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            self.add_fetch_time(time.perf_counter() - start)
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        try:
+            return super().fetchmany(self.arraysize if size is None else size)
+        finally:
+            self.add_fetch_time(time.perf_counter() - start)
+
+    def fetchall(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self.add_fetch_time(time.perf_counter() - start)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            return super().__next__()
+        finally:
+            self.add_fetch_time(time.perf_counter() - start)
+
+
+class TracedConnection(sqlite3.Connection):
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+
+class TracedCommandTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # 명령어 콜백과 같은 태스크에서 실행되므로 여기서 만든 트레이스가 콜백까지 전파됨
+        if interaction.type is discord.InteractionType.application_command:
+            trace = Trace(
+                f"/{interaction.data.get('name')}",
+                guild_id=interaction.guild_id,
+                user_id=interaction.user.id,
+            )
+            current_trace.set(trace)
+            interaction.extras["trace"] = trace
+        return True
+
+
 intents = discord.Intents.all()
-bot = commands.Bot(command_prefix="/", intents=intents)
+bot = commands.Bot(
+    command_prefix="/",
+    intents=intents,
+    tree_cls=TracedCommandTree,
+    enable_debug_events=bool(GATEWAY_RECORD_FILE),  # on_socket_raw_receive 용
+)
+
+# ---------- 로깅 ----------
+
+# 레벨을 따로 조정할 수 있는 로거 (서브시스템)
+LOG_SUBSYSTEMS = (
+    "bot",
+    "bot.verify",
+    "bot.roblox",
+    "bot.commands",
+    "bot.tasks",
+    "bot.db",
+    "discord",
+)
+LOG_CONTEXT_FIELDS = ("guild_id", "user_id", "command", "latency_ms")
+
+log = logging.getLogger("bot")
+verify_log = logging.getLogger("bot.verify")
+roblox_log = logging.getLogger("bot.roblox")
+command_log = logging.getLogger("bot.commands")
+task_log = logging.getLogger("bot.tasks")
+db_log = logging.getLogger("bot.db")
+
+
+class JsonLogFormatter(logging.Formatter):
+    """한 줄에 하나씩 JSON으로 출력 (guild_id 등 extra 필드 포함)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in LOG_CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    # 같은 프로세스 안이므로 메시지 포맷도 리스너 스레드에서 하도록 그대로 넘김
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """이벤트 루프에서는 큐에 넣기만 하고 포맷/출력은 리스너 스레드에서 처리"""
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonLogFormatter())
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root_logger = logging.getLogger()
+    root_logger.handlers[:] = [DeferredQueueHandler(log_queue)]
+    root_logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    return listener
+
+
+def interaction_log_context(interaction: discord.Interaction) -> dict:
+    return {
+        "guild_id": interaction.guild_id,
+        "user_id": interaction.user.id,
+        "command": interaction.command.qualified_name if interaction.command else None,
+    }
+
 
 error_logs = []
 MAX_LOGS = 50
 
-DB_PATH = os.path.join(BASE_DIR, "bot.db")
-conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+BOT_START_TIME = time.time()
+
+# 길드 ID → 최근 인증 완료 시각 (대시보드 처리량 계산용)
+verify_timestamps: dict[int, deque[float]] = {}
+VERIFY_TIMESTAMPS_PER_GUILD = 10000
+
+DB_PATH = os.getenv("DB_PATH") or os.path.join(BASE_DIR, "bot.db")
+conn = sqlite3.connect(DB_PATH, check_same_thread=False, factory=TracedConnection)
 cursor = conn.cursor()
 
+# 빈 페이지를 조금씩 회수할 수 있도록 INCREMENTAL 모드 사용 (기존 DB는 한 번 VACUUM 해야 적용됨)
+if cursor.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    cursor.execute("VACUUM")
+
 # ---------- DB 테이블 ----------
 
 def get_guild_group_id(guild_id: int) -> Optional[int]:
@@ -58,60 +401,361 @@ def set_guild_group_id(guild_id: int, group_id: int) -> None:
     )
     conn.commit()
 
-cursor.execute(
-    """CREATE TABLE IF NOT EXISTS users(
-        discord_id INTEGER,
-        guild_id INTEGER,
-        roblox_nick TEXT,
-        roblox_user_id INTEGER,
-        code TEXT,
-        expire_time TEXT,
-        verified INTEGER DEFAULT 0,
-        PRIMARY KEY(discord_id, guild_id)
-    )"""
-)
 
-cursor.execute(
-    """CREATE TABLE IF NOT EXISTS stats(
-        guild_id INTEGER PRIMARY KEY,
-        verify_count INTEGER DEFAULT 0,
-        force_count INTEGER DEFAULT 0,
-        cancel_count INTEGER DEFAULT 0
-    )"""
-)
+# ---------- DB 마이그레이션 ----------
+# PRAGMA user_version = 적용된 마이그레이션 수
+# 예전 버전 DB(user_version=0)에도 그대로 적용되도록 각 단계는 이미 있는 테이블/컬럼을 건너뜀
 
-cursor.execute(
-    """CREATE TABLE IF NOT EXISTS settings(
-        guild_id INTEGER PRIMARY KEY,
-        role_id INTEGER,
-        status_channel_id INTEGER,
-        admin_role_id INTEGER
-    )"""
-)
 
-cursor.execute(
-    """CREATE TABLE IF NOT EXISTS bot_status(
-        id INTEGER PRIMARY KEY,
-        status_text TEXT,
-        status_type INTEGER DEFAULT 0
-    )"""
-)
+def add_column(cur: sqlite3.Cursor, table: str, column: str, decl: str) -> None:
+    columns = {row[1] for row in cur.execute(f"PRAGMA table_info({table})").fetchall()}
+    if column not in columns:
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+def migrate_base_tables(cur: sqlite3.Cursor) -> None:
+    """기본 테이블"""
+    cur.execute(
+        """CREATE TABLE IF NOT EXISTS users(
+            discord_id INTEGER,
+            guild_id INTEGER,
+            roblox_nick TEXT,
+            roblox_user_id INTEGER,
+            code TEXT,
+            expire_time TEXT,
+            verified INTEGER DEFAULT 0,
+            PRIMARY KEY(discord_id, guild_id)
+        )"""
+    )
+    cur.execute(
+        """CREATE TABLE IF NOT EXISTS stats(
+            guild_id INTEGER PRIMARY KEY,
+            verify_count INTEGER DEFAULT 0,
+            force_count INTEGER DEFAULT 0,
+            cancel_count INTEGER DEFAULT 0
+        )"""
+    )
+    cur.execute(
+        """CREATE TABLE IF NOT EXISTS settings(
+            guild_id INTEGER PRIMARY KEY,
+            role_id INTEGER,
+            status_channel_id INTEGER
+        )"""
+    )
+    cur.execute(
+        """CREATE TABLE IF NOT EXISTS bot_status(
+            id INTEGER PRIMARY KEY,
+            status_text TEXT,
+            status_type INTEGER DEFAULT 0
+        )"""
+    )
+    cur.execute(
+        """CREATE TABLE IF NOT EXISTS group_settings(
+            guild_id INTEGER PRIMARY KEY,
+            group_id INTEGER
+        )"""
+    )
+    cur.execute(
+        """CREATE TABLE IF NOT EXISTS roblox_rank(
+            id INTEGER PRIMARY KEY,
+            rank_name TEXT,
+            rank_value INTEGER
+        )"""
+    )
+
+
+def migrate_settings_columns(cur: sqlite3.Cursor) -> None:
+    """관리자 역할 테이블과 settings 추가 컬럼"""
+    cur.execute(
+        """CREATE TABLE IF NOT EXISTS admin_roles(
+            guild_id INTEGER,
+            role_id INTEGER,
+            PRIMARY KEY(guild_id, role_id)
+        )"""
+    )
+    add_column(cur, "settings", "admin_role_id", "INTEGER")
+    add_column(cur, "settings", "auto_reconcile", "INTEGER DEFAULT 0")
+    add_column(cur, "settings", "status_message_id", "INTEGER")
+    add_column(cur, "settings", "identity_reuse", "INTEGER DEFAULT 0")
+
+    # 예전 settings.admin_role_id 값은 admin_roles 테이블로 옮기고 비움
+    cur.execute(
+        """INSERT OR IGNORE INTO admin_roles(guild_id, role_id)
+           SELECT guild_id, admin_role_id FROM settings WHERE admin_role_id IS NOT NULL"""
+    )
+    cur.execute("UPDATE settings SET admin_role_id=NULL WHERE admin_role_id IS NOT NULL")
+
+
+def migrate_identities(cur: sqlite3.Cursor) -> None:
+    """서버 간 인증 재사용용 (디스코드 유저별 최근 인증 계정)"""
+    cur.execute(
+        """CREATE TABLE IF NOT EXISTS identities(
+            discord_id INTEGER PRIMARY KEY,
+            roblox_user_id INTEGER,
+            roblox_nick TEXT,
+            verified_at TEXT
+        )"""
+    )
+
+
+def migrate_roblox_usernames(cur: sqlite3.Cursor) -> None:
+    """로블록스 닉네임 → ID 조회 캐시 (재시작 후에도 유지)"""
+    cur.execute(
+        """CREATE TABLE IF NOT EXISTS roblox_usernames(
+            name_lower TEXT PRIMARY KEY,
+            user_id INTEGER,
+            fetched_at REAL
+        )"""
+    )
+
+
+def migrate_retry_queue(cur: sqlite3.Cursor) -> None:
+    """실패한 DM/역할 부여/닉네임 변경 재시도 큐 (status: pending → 재시도, dead → 관리자 확인용)"""
+    cur.execute(
+        """CREATE TABLE IF NOT EXISTS retry_queue(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            kind TEXT,
+            target_id INTEGER,
+            payload TEXT,
+            error TEXT,
+            attempts INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'pending',
+            next_attempt_at REAL,
+            created_at REAL
+        )"""
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_retry_queue_due ON retry_queue(status, next_attempt_at)"
+    )
+
+
+def migrate_users_rebuild(cur: sqlite3.Cursor) -> None:
+    """users.verified를 NOT NULL로 바꾸고 (테이블 재구성) 자주 쓰는 조회용 인덱스 추가"""
+    cur.execute(
+        """CREATE TABLE users_new(
+            discord_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            roblox_nick TEXT,
+            roblox_user_id INTEGER,
+            code TEXT,
+            expire_time TEXT,
+            verified INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY(discord_id, guild_id)
+        )"""
+    )
+    cur.execute(
+        """INSERT INTO users_new(discord_id, guild_id, roblox_nick, roblox_user_id,
+               code, expire_time, verified)
+           SELECT discord_id, guild_id, roblox_nick, roblox_user_id,
+               code, expire_time, COALESCE(verified, 0)
+           FROM users WHERE discord_id IS NOT NULL AND guild_id IS NOT NULL"""
+    )
+    # 기존 users의 인덱스/트리거는 테이블과 함께 삭제되므로 아래와 다음 단계에서 다시 만듦
+    cur.execute("DROP TABLE users")
+    cur.execute("ALTER TABLE users_new RENAME TO users")
+
+    # 유저 검색 키셋 페이지네이션용
+    cur.execute(
+        "CREATE INDEX idx_users_guild_nick ON users(guild_id, roblox_nick, discord_id)"
+    )
+    # 서버별 인증 유저 조회 (명단, 내보내기, 재동기화, 공지) 및 대기 중인 인증 수
+    cur.execute(
+        "CREATE INDEX idx_users_guild_verified ON users(guild_id, verified, expire_time)"
+    )
+    # 만료된 대기 행 정리용
+    cur.execute("CREATE INDEX idx_users_pending_expire ON users(expire_time) WHERE verified=0")
+
+
+def migrate_guild_counters(cur: sqlite3.Cursor) -> None:
+    """서버별 유저 수 / 인증 횟수를 트리거로 유지 (guild_id=0 행은 전체 합계)
+
+    상태 명령어가 COUNT(*) 대신 기본 키 한 행만 읽도록 함
+    트리거 안의 INSERT OR IGNORE는 바깥 upsert의 충돌 처리로 덮어써지므로 NOT IN으로 확인"""
+    cur.execute(
+        """CREATE TABLE IF NOT EXISTS guild_counters(
+            guild_id INTEGER PRIMARY KEY,
+            total INTEGER NOT NULL DEFAULT 0,
+            verified INTEGER NOT NULL DEFAULT 0,
+            pending INTEGER NOT NULL DEFAULT 0,
+            verify_count INTEGER NOT NULL DEFAULT 0
+        )"""
+    )
+    for name in (
+        "users_counters_insert",
+        "users_counters_delete",
+        "users_counters_update",
+        "stats_counters_insert",
+        "stats_counters_update",
+        "stats_counters_delete",
+    ):
+        cur.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+    cur.execute(
+        """CREATE TRIGGER users_counters_insert AFTER INSERT ON users BEGIN
+            INSERT INTO guild_counters(guild_id)
+                SELECT value FROM (SELECT NEW.guild_id AS value UNION SELECT 0)
+                WHERE value NOT IN (SELECT guild_id FROM guild_counters);
+            UPDATE guild_counters SET
+                total = total + 1,
+                verified = verified + (NEW.verified IS 1),
+                pending = pending + (NEW.verified IS NOT 1)
+            WHERE guild_id IN (NEW.guild_id, 0);
+        END"""
+    )
+    cur.execute(
+        """CREATE TRIGGER users_counters_delete AFTER DELETE ON users BEGIN
+            UPDATE guild_counters SET
+                total = total - 1,
+                verified = verified - (OLD.verified IS 1),
+                pending = pending - (OLD.verified IS NOT 1)
+            WHERE guild_id IN (OLD.guild_id, 0);
+        END"""
+    )
+    cur.execute(
+        """CREATE TRIGGER users_counters_update
+        AFTER UPDATE OF guild_id, verified ON users BEGIN
+            UPDATE guild_counters SET
+                total = total - 1,
+                verified = verified - (OLD.verified IS 1),
+                pending = pending - (OLD.verified IS NOT 1)
+            WHERE guild_id IN (OLD.guild_id, 0);
+            INSERT INTO guild_counters(guild_id)
+                SELECT NEW.guild_id WHERE NEW.guild_id NOT IN (SELECT guild_id FROM guild_counters);
+            UPDATE guild_counters SET
+                total = total + 1,
+                verified = verified + (NEW.verified IS 1),
+                pending = pending + (NEW.verified IS NOT 1)
+            WHERE guild_id IN (NEW.guild_id, 0);
+        END"""
+    )
+    cur.execute(
+        """CREATE TRIGGER stats_counters_insert AFTER INSERT ON stats BEGIN
+            INSERT INTO guild_counters(guild_id)
+                SELECT value FROM (SELECT NEW.guild_id AS value UNION SELECT 0)
+                WHERE value NOT IN (SELECT guild_id FROM guild_counters);
+            UPDATE guild_counters SET verify_count = verify_count + NEW.verify_count
+            WHERE guild_id IN (NEW.guild_id, 0);
+        END"""
+    )
+    cur.execute(
+        """CREATE TRIGGER stats_counters_update
+        AFTER UPDATE OF verify_count ON stats BEGIN
+            UPDATE guild_counters SET verify_count = verify_count + NEW.verify_count - OLD.verify_count
+            WHERE guild_id IN (NEW.guild_id, 0);
+        END"""
+    )
+    cur.execute(
+        """CREATE TRIGGER stats_counters_delete AFTER DELETE ON stats BEGIN
+            UPDATE guild_counters SET verify_count = verify_count - OLD.verify_count
+            WHERE guild_id IN (OLD.guild_id, 0);
+        END"""
+    )
+
+    # 기존 데이터로 카운터 채우기
+    cur.execute("DELETE FROM guild_counters")
+    cur.execute(
+        """INSERT INTO guild_counters(guild_id, total, verified, pending)
+           SELECT guild_id, COUNT(*), SUM(verified IS 1), SUM(verified IS NOT 1)
+           FROM users GROUP BY guild_id"""
+    )
+    cur.execute(
+        """INSERT INTO guild_counters(guild_id, verify_count)
+           SELECT guild_id, verify_count FROM stats WHERE true
+           ON CONFLICT(guild_id) DO UPDATE SET verify_count=excluded.verify_count"""
+    )
+    cur.execute(
+        """INSERT INTO guild_counters(guild_id, total, verified, pending, verify_count)
+           SELECT 0, COALESCE(SUM(total), 0), COALESCE(SUM(verified), 0),
+                  COALESCE(SUM(pending), 0), COALESCE(SUM(verify_count), 0)
+           FROM guild_counters"""
+    )
+
+
+def migrate_identities_backfill(cur: sqlite3.Cursor) -> None:
+    """identities 테이블 이전에 인증된 유저도 재사용되도록 가장 최근 인증으로 채움"""
+    cur.execute(
+        """INSERT OR IGNORE INTO identities(discord_id, roblox_user_id, roblox_nick, verified_at)
+           SELECT discord_id, roblox_user_id, roblox_nick, MAX(expire_time)
+           FROM users
+           WHERE verified=1 AND roblox_user_id IS NOT NULL AND roblox_nick IS NOT NULL
+           GROUP BY discord_id"""
+    )
+
+
+def migrate_users_rank(cur: sqlite3.Cursor) -> None:
+    """재입장 복구용 마지막으로 알려진 랭크 (재시작 후에도 로블록스 호출 없이 복구)"""
+    add_column(cur, "users", "rank_name", "TEXT")
+    add_column(cur, "users", "rank_group_id", "INTEGER")
+
+
+def migrate_retry_queue_unique(cur: sqlite3.Cursor) -> None:
+    """같은 작업이 실패할 때마다 행이 늘지 않도록 (서버, 종류, 대상)당 한 행"""
+    cur.execute(
+        """DELETE FROM retry_queue WHERE kind != 'dm' AND id NOT IN (
+               SELECT MAX(id) FROM retry_queue GROUP BY guild_id, kind, target_id)"""
+    )
+    cur.execute(
+        """CREATE UNIQUE INDEX IF NOT EXISTS idx_retry_queue_target
+           ON retry_queue(guild_id, kind, target_id)"""
+    )
+
+
+def migrate_retry_queue_dm_rows(cur: sqlite3.Cursor) -> None:
+    """DM은 공지마다 내용이 달라 덮어쓰면 앞 공지가 사라지므로 고유 키에서 제외"""
+    cur.execute("DROP INDEX IF EXISTS idx_retry_queue_target")
+    cur.execute(
+        """CREATE UNIQUE INDEX idx_retry_queue_target
+           ON retry_queue(guild_id, kind, target_id) WHERE kind != 'dm'"""
+    )
+
 
-cursor.execute(
-    """CREATE TABLE IF NOT EXISTS roblox_rank(
-        id INTEGER PRIMARY KEY,
-        rank_name TEXT,
-        rank_value INTEGER
-    )"""
+# 순서대로 적용 (한 번 배포된 항목은 수정하지 말고 뒤에 추가)
+MIGRATIONS = (
+    migrate_base_tables,
+    migrate_settings_columns,
+    migrate_identities,
+    migrate_roblox_usernames,
+    migrate_retry_queue,
+    migrate_users_rebuild,
+    migrate_guild_counters,
+    migrate_identities_backfill,
+    migrate_users_rank,
+    migrate_retry_queue_unique,
+    migrate_retry_queue_dm_rows,
 )
 
-# 이미 있는 DB에는 admin_role_id 컬럼이 없을 수 있으므로 추가 시도
-try:
-    cursor.execute("ALTER TABLE settings ADD COLUMN admin_role_id INTEGER")
-except sqlite3.OperationalError:
-    pass
 
-conn.commit()
+def run_migrations() -> str:
+    """밀린 마이그레이션을 한 트랜잭션으로 적용 → 시작 로그용 요약"""
+    version = cursor.execute("PRAGMA user_version").fetchone()[0]
+    if version >= len(MIGRATIONS):
+        return f"DB 스키마 최신 (v{version})"
+
+    start = time.perf_counter()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        for migration in MIGRATIONS[version:]:
+            migration(cursor)
+        cursor.execute(f"PRAGMA user_version={len(MIGRATIONS)}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return f"DB 마이그레이션 v{version} → v{len(MIGRATIONS)} ({elapsed_ms:.1f} ms)"
+
+
+migration_summary = run_migrations()
+
+
+def get_guild_counters(guild_id: int) -> tuple[int, int, int, int]:
+    """(전체 유저, 인증, 대기, 인증 횟수), guild_id=0이면 전체 합계"""
+    cursor.execute(
+        "SELECT total, verified, pending, verify_count FROM guild_counters WHERE guild_id=?",
+        (guild_id,),
+    )
+    return cursor.fetchone() or (0, 0, 0, 0)
 
 # ---------- 설정/권한 유틸 ----------
 
@@ -148,20 +792,43 @@ def set_guild_status_channel_id(guild_id: int, channel_id: int) -> None:
     conn.commit()
 
 
-def get_guild_admin_role_id(guild_id: int) -> Optional[int]:
-    cursor.execute("SELECT admin_role_id FROM settings WHERE guild_id=?", (guild_id,))
+def get_guild_status_message_id(guild_id: int) -> Optional[int]:
+    cursor.execute("SELECT status_message_id FROM settings WHERE guild_id=?", (guild_id,))
     row = cursor.fetchone()
     return row[0] if row else None
 
 
-def set_guild_admin_role_id(guild_id: int, role_id: Optional[int]) -> None:
+def set_guild_status_message_id(guild_id: int, message_id: Optional[int]) -> None:
     cursor.execute(
-        """INSERT INTO settings(guild_id, admin_role_id)
+        """INSERT INTO settings(guild_id, status_message_id)
            VALUES(?, ?)
-           ON CONFLICT(guild_id) DO UPDATE SET admin_role_id=excluded.admin_role_id""",
-        (guild_id, role_id),
+           ON CONFLICT(guild_id) DO UPDATE SET status_message_id=excluded.status_message_id""",
+        (guild_id, message_id),
+    )
+    conn.commit()
+
+
+# 길드 ID → 관리자 역할 ID 집합 (쓰기 시 갱신)
+admin_role_cache: dict[int, frozenset[int]] = {}
+
+
+def get_guild_admin_role_ids(guild_id: int) -> frozenset[int]:
+    role_ids = admin_role_cache.get(guild_id)
+    if role_ids is None:
+        cursor.execute("SELECT role_id FROM admin_roles WHERE guild_id=?", (guild_id,))
+        role_ids = frozenset(row[0] for row in cursor.fetchall())
+        admin_role_cache[guild_id] = role_ids
+    return role_ids
+
+
+def set_guild_admin_role_ids(guild_id: int, role_ids: list[int]) -> None:
+    cursor.execute("DELETE FROM admin_roles WHERE guild_id=?", (guild_id,))
+    cursor.executemany(
+        "INSERT INTO admin_roles(guild_id, role_id) VALUES(?, ?)",
+        [(guild_id, role_id) for role_id in role_ids],
     )
     conn.commit()
+    admin_role_cache[guild_id] = frozenset(role_ids)
 
 
 def is_admin(member: discord.Member) -> bool:
@@ -169,12 +836,10 @@ def is_admin(member: discord.Member) -> bool:
     if member.guild_permissions.administrator:
         return True
 
-    # 커스텀 관리자 역할
-    admin_role_id = get_guild_admin_role_id(member.guild.id)
-    if admin_role_id:
-        admin_role = member.guild.get_role(admin_role_id)
-        if admin_role and admin_role in member.roles:
-            return True
+    # 커스텀 관리자 역할 (캐시된 집합과 멤버 역할 ID 비교, DB 조회 없음)
+    admin_role_ids = get_guild_admin_role_ids(member.guild.id)
+    if admin_role_ids and not admin_role_ids.isdisjoint(role.id for role in member.roles):
+        return True
 
     return False
 
@@ -183,144 +848,731 @@ def is_owner(user_id: int) -> bool:
     return OWNER_ID > 0 and user_id == OWNER_ID
 
 
-def add_error_log(error_msg: str) -> None:
+def add_error_log(error_msg: str, logger: logging.Logger = log, **context) -> None:
     error_logs.append({"timestamp": datetime.now(timezone.utc), "message": error_msg})
     if len(error_logs) > MAX_LOGS:
         error_logs.pop(0)
+    logger.error(error_msg, extra=context)
 
 
 def generate_code() -> str:
     return "".join(random.choices(string.ascii_uppercase + string.digits, k=8))
 
 
+# ---------- 속도 제한 / 백그라운드 작업 ----------
+
+
+class RateLimiter:
+    """토큰 버킷 방식의 간단한 속도 제한기"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# 멤버 역할/닉네임 변경 등 디스코드 REST 호출용 (초당 4회, 순간 5회)
+member_edit_limiter = RateLimiter(rate=4, burst=5)
+
+background_tasks: set[asyncio.Task] = set()
+
+
+def spawn_background(coro) -> asyncio.Task:
+    """참조를 유지한 채로 백그라운드 작업 실행"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+
+# ---------- 로블닉 자동완성 인덱스 ----------
+
+
+AUTOCOMPLETE_LIMIT = 25  # 디스코드 자동완성 최대 선택지 수
+
+
+class NickIndex:
+    """길드의 인증된 로블닉 접두사 인덱스 (정렬 배열 + bisect)"""
+
+    def __init__(self, rows: list[tuple[int, str]]):
+        self.by_id: dict[int, str] = {}
+        self.keys: list[tuple[str, int]] = []  # (casefold 로블닉, discord_id) 정렬 상태 유지
+        for discord_id, nick in rows:
+            if nick:
+                self.by_id[discord_id] = nick
+                self.keys.append((nick.casefold(), discord_id))
+        self.keys.sort()
+
+    def __contains__(self, discord_id: int) -> bool:
+        return discord_id in self.by_id
+
+    def add(self, discord_id: int, nick: str) -> None:
+        self.remove(discord_id)
+        self.by_id[discord_id] = nick
+        bisect.insort(self.keys, (nick.casefold(), discord_id))
+
+    def remove(self, discord_id: int) -> None:
+        nick = self.by_id.pop(discord_id, None)
+        if nick is None:
+            return
+        key = (nick.casefold(), discord_id)
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+
+    def search(self, prefix: str, limit: int = AUTOCOMPLETE_LIMIT) -> list[tuple[str, int]]:
+        """접두사로 시작하는 (로블닉, discord_id) 목록"""
+        prefix = prefix.casefold()
+        results = []
+        i = bisect.bisect_left(self.keys, (prefix,))
+        while i < len(self.keys) and len(results) < limit:
+            key, discord_id = self.keys[i]
+            if not key.startswith(prefix):
+                break
+            results.append((self.by_id[discord_id], discord_id))
+            i += 1
+        return results
+
+    def find(self, nick: str) -> Optional[int]:
+        """로블닉이 정확히 일치하는 discord_id"""
+        key = nick.casefold()
+        i = bisect.bisect_left(self.keys, (key,))
+        if i < len(self.keys) and self.keys[i][0] == key:
+            return self.keys[i][1]
+        return None
+
+
+nick_indexes: dict[int, NickIndex] = {}
+
+
+def get_nick_index(guild_id: int) -> NickIndex:
+    """처음 사용할 때 DB에서 한 번만 만들고 이후에는 메모리에서 사용"""
+    index = nick_indexes.get(guild_id)
+    if index is None:
+        cursor.execute(
+            "SELECT discord_id, roblox_nick FROM users WHERE guild_id=? AND verified=1",
+            (guild_id,),
+        )
+        index = NickIndex(cursor.fetchall())
+        nick_indexes[guild_id] = index
+    return index
+
+
+def nick_index_add(guild_id: int, discord_id: int, nick: str) -> None:
+    # 아직 만들어지지 않은 인덱스는 처음 사용할 때 DB에서 읽으므로 건너뜀
+    index = nick_indexes.get(guild_id)
+    if index is not None:
+        index.add(discord_id, nick)
+
+
+def nick_index_remove(guild_id: int, discord_id: int) -> None:
+    index = nick_indexes.get(guild_id)
+    if index is not None:
+        index.remove(discord_id)
+
+
+async def roblox_nick_autocomplete(
+    interaction: discord.Interaction, current: str
+) -> list[app_commands.Choice[str]]:
+    # 명령어 본문과 같은 관리자 확인 (없으면 누구나 접두어로 인증 명단을 훑을 수 있음)
+    if not (isinstance(interaction.user, discord.Member) and is_admin(interaction.user)):
+        return []
+    return [
+        app_commands.Choice(name=nick, value=nick)
+        for nick, _ in get_nick_index(interaction.guild.id).search(current)
+    ]
+
+
 ROBLOX_USERNAME_API = "https://users.roblox.com/v1/usernames/users"
 ROBLOX_USER_API = "https://users.roblox.com/v1/users/{userId}"
+ROBLOX_USERS_BATCH_API = "https://users.roblox.com/v1/users"
+ROBLOX_GROUP_ROLES_API = "https://groups.roblox.com/v1/users/{userId}/groups/roles"
+ROBLOX_BATCH_SIZE = 100
+DEFAULT_GROUP_ID = 34965893
+
+RANK_CACHE_TTL = 6 * 60 * 60  # 초
+RANK_CACHE_SIZE = 4096
+
+# (로블록스 유저 ID, 그룹 ID) → (랭크 이름 또는 None(그룹 미가입), 조회 시각), 최근 사용 순
+# 재시작/만료 후 재입장 복구는 users.rank_name (마지막으로 알려진 랭크)을 사용
+rank_cache: OrderedDict[tuple[int, int], tuple[Optional[str], float]] = OrderedDict()
+
+
+def get_cached_rank(user_id: int, group_id: int) -> tuple[bool, Optional[str]]:
+    """캐시된 랭크 → (유효한 캐시 여부, 랭크 이름), 만료된 항목은 삭제"""
+    key = (user_id, group_id)
+    cached = rank_cache.get(key)
+    if cached is None:
+        return False, None
+    if time.monotonic() - cached[1] > RANK_CACHE_TTL:
+        del rank_cache[key]
+        return False, None
+    rank_cache.move_to_end(key)
+    return True, cached[0]
+
+
+def cache_rank(user_id: int, group_id: int, rank_name: Optional[str]) -> None:
+    key = (user_id, group_id)
+    rank_cache[key] = (rank_name, time.monotonic())
+    rank_cache.move_to_end(key)
+    if len(rank_cache) > RANK_CACHE_SIZE:
+        rank_cache.popitem(last=False)
+
+
+def save_member_rank(
+    guild_id: int, discord_id: int, group_id: int, rank_name: Optional[str]
+) -> None:
+    """마지막으로 알려진 랭크를 users 행에 기록 (커밋은 호출한 쪽에서)"""
+    cursor.execute(
+        "UPDATE users SET rank_name=?, rank_group_id=? WHERE discord_id=? AND guild_id=?",
+        (rank_name, group_id, discord_id, guild_id),
+    )
 
 # ---------- Roblox API ----------
 
 
-async def roblox_get_group_rank_by_user_id(
-    user_id: int, group_id: int = 34965893
-) -> Optional[str]:
-    """유저의 그룹 랭크 가져오기"""
-    url = f"https://groups.roblox.com/v1/users/{user_id}/groups/roles"
+ROBLOX_HEALTH_WINDOW = 10 * 60  # 오류율 계산 구간 (초)
 
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
-                if resp.status != 200:
-                    return None
-                data = await resp.json()
+roblox_metrics = {"requests": 0, "errors": 0}
+roblox_recent_results: deque[tuple[float, bool]] = deque(maxlen=1000)
 
-                for group_data in data.get("data", []):
-                    if group_data["group"]["id"] == group_id:
-                        return group_data["role"]["name"]
 
-                return None
-        except Exception as e:
-            print(f"roblox_get_group_rank error: {repr(e)}")
-            add_error_log(f"roblox_get_group_rank: {repr(e)}")
-            return None
+def record_roblox_result(ok: bool) -> None:
+    roblox_metrics["requests"] += 1
+    if not ok:
+        roblox_metrics["errors"] += 1
+    roblox_recent_results.append((time.monotonic(), ok))
 
 
-async def roblox_get_user_id_by_username(username: str) -> Optional[int]:
-    payload = {"usernames": [username], "excludeBannedUsers": True}
+def get_roblox_error_rate() -> tuple[int, float]:
+    """최근 구간의 (요청 수, 오류율)"""
+    since = time.monotonic() - ROBLOX_HEALTH_WINDOW
+    recent = [ok for ts, ok in roblox_recent_results if ts >= since]
+    if not recent:
+        return 0, 0.0
+    return len(recent), recent.count(False) / len(recent)
+
+
+# 우선순위 높은 순: 유저 인증 > 관리자 명령어 > 백그라운드/일괄 작업
+ROBLOX_PRIORITIES = ("interactive", "admin", "background")
+ROBLOX_RATE = float(os.getenv("ROBLOX_RATE", "10"))  # 초당 요청 수
+ROBLOX_BURST = int(os.getenv("ROBLOX_BURST", "10"))
+
+# 현재 작업의 Roblox 요청 우선순위 (명령어/이벤트마다 별도 태스크라 set만 해도 됨)
+roblox_priority: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "roblox_priority", default="admin"
+)
+
 
-    async with aiohttp.ClientSession() as session:
+class PriorityRateLimiter:
+    """모든 Roblox 요청이 공유하는 토큰 버킷
+
+    토큰이 생기면 가장 높은 우선순위 대기열부터 내주므로
+    일괄 작업은 남는 용량만 사용함"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.queues: dict[str, deque[tuple[asyncio.Future, float]]] = {
+            p: deque() for p in ROBLOX_PRIORITIES
+        }
+        self.waits: dict[str, deque[float]] = {p: deque(maxlen=500) for p in ROBLOX_PRIORITIES}
+        self.served: Counter = Counter()
+        self.dispatcher: Optional[asyncio.Task] = None
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def record(self, priority: str, waited: float) -> None:
+        self.served[priority] += 1
+        self.waits[priority].append(waited)
+
+    async def acquire(self, priority: str) -> None:
+        self.refill()
+        if self.tokens >= 1 and not any(self.queues.values()):
+            self.tokens -= 1
+            self.record(priority, 0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (future, time.monotonic())
+        self.queues[priority].append(entry)
+        if self.dispatcher is None or self.dispatcher.done():
+            self.dispatcher = spawn_background(self.dispatch())
         try:
-            async with session.post(
-                ROBLOX_USERNAME_API,
-                json=payload,
-                timeout=aiohttp.ClientTimeout(total=10),
-            ) as resp:
-                if resp.status != 200:
-                    return None
-                data = await resp.json()
-                results = data.get("data", [])
-                return results[0].get("id") if results else None
-        except Exception as e:
-            add_error_log(f"roblox_get_user_id: {repr(e)}")
-            return None
+            await future
+        except asyncio.CancelledError:
+            if not future.done():
+                self.queues[priority].remove(entry)
+            raise
+
+    async def dispatch(self) -> None:
+        while any(self.queues.values()):
+            self.refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                continue
+            for priority in ROBLOX_PRIORITIES:
+                if self.queues[priority]:
+                    future, queued_at = self.queues[priority].popleft()
+                    if not future.done():
+                        self.tokens -= 1
+                        self.record(priority, time.monotonic() - queued_at)
+                        future.set_result(None)
+                    break
+
+    def snapshot(self) -> dict[str, dict]:
+        """우선순위별 대기열 길이와 대기 시간 (ms)"""
+        result = {}
+        for priority in ROBLOX_PRIORITIES:
+            waits = sorted(self.waits[priority])
+            result[priority] = {
+                "queued": len(self.queues[priority]),
+                "served": self.served[priority],
+                "avg_wait_ms": sum(waits) / len(waits) * 1000 if waits else 0.0,
+                "p95_wait_ms": percentile(waits, 95) * 1000,
+            }
+        return result
+
+
+roblox_limiter = PriorityRateLimiter(ROBLOX_RATE, ROBLOX_BURST)
+
+
+json_loads = orjson.loads if SPEED_PROFILE and orjson else json.loads
+
+roblox_session: Optional[aiohttp.ClientSession] = None
+
+
+def get_roblox_session() -> aiohttp.ClientSession:
+    """Roblox API 공용 세션 (연결/DNS 캐시 재사용)"""
+    global roblox_session
+    if roblox_session is None or roblox_session.closed:
+        resolver = aiohttp.AsyncResolver() if SPEED_PROFILE and aiodns else None
+        roblox_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(resolver=resolver, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=10),
+        )
+    return roblox_session
 
 
-async def roblox_get_description_by_user_id(user_id: int) -> Optional[str]:
-    url = ROBLOX_USER_API.format(userId=user_id)
-    async with aiohttp.ClientSession() as session:
+async def roblox_request(label: str, method: str, url: str, **kwargs) -> Optional[dict]:
+    """Roblox API 호출 공통 처리 → 200 응답이면 JSON, 아니면 None"""
+    priority = roblox_priority.get()
+    with span(f"roblox wait ({priority})"):
+        await roblox_limiter.acquire(priority)
+
+    with span(f"roblox {label}"):
         try:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            async with get_roblox_session().request(method, url, **kwargs) as resp:
+                # 4xx(없는 유저 등)는 정상 응답으로 보고 429/5xx만 오류로 집계
+                record_roblox_result(resp.status < 500 and resp.status != 429)
                 if resp.status != 200:
                     return None
-                data = await resp.json()
-                return data.get("description")
+                return await resp.json(loads=json_loads)
         except Exception as e:
-            add_error_log(f"roblox_get_description: {repr(e)}")
+            record_roblox_result(False)
+            add_error_log(f"{label}: {repr(e)}", roblox_log)
             return None
 
 
-# ---------- View ----------
-
+async def roblox_get_group_rank_by_user_id(
+    user_id: int, group_id: int = DEFAULT_GROUP_ID
+) -> Optional[str]:
+    """유저의 그룹 랭크 가져오기"""
+    url = ROBLOX_GROUP_ROLES_API.format(userId=user_id)
 
-class VerifyView(discord.ui.View):
-    def __init__(self, code: str, expire_time: datetime, guild_id: int):
-        super().__init__(timeout=300)
-        self.code = code
-        self.expire_time = expire_time
-        self.guild_id = guild_id
+    data = await roblox_request("roblox_get_group_rank", "GET", url)
+    if data is None:
+        return None
 
-    @discord.ui.button(label="인증하기", style=discord.ButtonStyle.green)
-    async def verify_button(
-        self, interaction: discord.Interaction, button: discord.ui.Button
-    ):
-        if interaction is None:
-            return
-        try:
-            guild = bot.get_guild(self.guild_id)
-            if guild is None:
-                if not interaction.response.is_done():
-                    await interaction.response.send_message(
-                        "❌ 서버 정보를 불러올 수 없습니다.", ephemeral=True
-                    )
-                return
+    rank_name = None
+    for group_data in data.get("data", []):
+        if group_data["group"]["id"] == group_id:
+            rank_name = group_data["role"]["name"]
+            break
 
-            cursor.execute(
-                "SELECT roblox_nick, roblox_user_id, expire_time, code FROM users WHERE discord_id=? AND guild_id=?",
-                (interaction.user.id, self.guild_id),
-            )
-            data = cursor.fetchone()
+    cache_rank(user_id, group_id, rank_name)
+    return rank_name
 
-            if not data:
-                if not interaction.response.is_done():
-                    await interaction.response.send_message(
-                        "❌ 인증 정보가 없습니다. 다시 /인증 명령어를 실행해주세요.",
-                        ephemeral=True,
-                    )
-                return
 
-            nick, roblox_user_id, expire_str, saved_code = data
-            expire = datetime.fromisoformat(expire_str)
+USERNAME_CACHE_TTL = int(os.getenv("USERNAME_CACHE_TTL", str(24 * 3600)))  # 초 (닉네임 변경 대비)
+USERNAME_LRU_SIZE = 2048
 
-            if datetime.now() > expire:
-                if not interaction.response.is_done():
-                    await interaction.response.send_message(
-                        "❌ 인증 시간이 만료되었습니다. 다시 /인증 명령어를 실행해주세요.",
-                        ephemeral=True,
-                    )
-                return
+# name_lower → (user_id, fetched_at), 최근 사용 순
+username_lru: OrderedDict[str, tuple[int, float]] = OrderedDict()
+username_cache_stats: Counter = Counter()
 
-            if saved_code != self.code:
-                if not interaction.response.is_done():
-                    await interaction.response.send_message(
-                        "❌ 코드가 일치하지 않습니다.", ephemeral=True
-                    )
-                return
 
-            if not roblox_user_id:
-                if not interaction.response.is_done():
-                    await interaction.response.send_message(
-                        "❌ Roblox 계정 정보가 없습니다. 다시 /인증 명령어를 실행해주세요.",
-                        ephemeral=True,
-                    )
-                return
+def get_cached_username(name_lower: str) -> Optional[int]:
+    """메모리 LRU → DB 순으로 조회, 없거나 만료되면 None"""
+    now = time.time()
+    cached = username_lru.get(name_lower)
+    if cached is not None and now - cached[1] <= USERNAME_CACHE_TTL:
+        username_lru.move_to_end(name_lower)
+        username_cache_stats["memory_hits"] += 1
+        return cached[0]
+
+    cursor.execute(
+        "SELECT user_id, fetched_at FROM roblox_usernames WHERE name_lower=?", (name_lower,)
+    )
+    row = cursor.fetchone()
+    if row is not None and now - row[1] <= USERNAME_CACHE_TTL:
+        lru_put(name_lower, row[0], row[1])
+        username_cache_stats["db_hits"] += 1
+        return row[0]
+
+    username_cache_stats["misses"] += 1
+    return None
+
+
+def lru_put(name_lower: str, user_id: int, fetched_at: float) -> None:
+    username_lru[name_lower] = (user_id, fetched_at)
+    username_lru.move_to_end(name_lower)
+    if len(username_lru) > USERNAME_LRU_SIZE:
+        username_lru.popitem(last=False)
+
+
+def remember_usernames(mappings: dict[str, int]) -> None:
+    """새로 알게 된 닉네임 → ID 매핑 저장 (fetched_at 갱신)"""
+    if not mappings:
+        return
+    now = time.time()
+    for name, user_id in mappings.items():
+        lru_put(name.lower(), user_id, now)
+    cursor.executemany(
+        """
+        INSERT INTO roblox_usernames(name_lower, user_id, fetched_at)
+        VALUES(?, ?, ?)
+        ON CONFLICT(name_lower) DO UPDATE SET
+            user_id=excluded.user_id,
+            fetched_at=excluded.fetched_at
+        """,
+        [(name.lower(), user_id, now) for name, user_id in mappings.items()],
+    )
+    conn.commit()
+
+
+def get_username_cache_hit_ratio() -> tuple[int, float]:
+    """(조회 수, 적중률)"""
+    total = sum(username_cache_stats.values())
+    if not total:
+        return 0, 0.0
+    hits = username_cache_stats["memory_hits"] + username_cache_stats["db_hits"]
+    return total, hits / total
+
+
+async def roblox_get_user_id_by_username(username: str) -> Optional[int]:
+    cached = get_cached_username(username.lower())
+    if cached is not None:
+        return cached
+
+    payload = {"usernames": [username], "excludeBannedUsers": True}
+
+    data = await roblox_request("roblox_get_user_id", "POST", ROBLOX_USERNAME_API, json=payload)
+    if data is None:
+        return None
+    results = data.get("data", [])
+    if not results:
+        return None
+    remember_usernames({results[0]["name"]: results[0]["id"]})
+    return results[0]["id"]
+
+
+async def roblox_get_description_by_user_id(user_id: int) -> Optional[str]:
+    url = ROBLOX_USER_API.format(userId=user_id)
+    data = await roblox_request("roblox_get_description", "GET", url)
+    if data is None:
+        return None
+    # 프로필 응답에 현재 닉네임도 있으므로 캐시 갱신
+    if data.get("name"):
+        remember_usernames({data["name"]: user_id})
+    return data.get("description")
+
+
+async def roblox_get_users_by_ids(user_ids: list[int]) -> Optional[dict[int, str]]:
+    """유저 ID 목록을 100개씩 일괄 조회 → {id: 닉네임} (존재하지 않는 ID는 제외)"""
+    found: dict[int, str] = {}
+    for i in range(0, len(user_ids), ROBLOX_BATCH_SIZE):
+        payload = {
+            "userIds": user_ids[i : i + ROBLOX_BATCH_SIZE],
+            "excludeBannedUsers": True,
+        }
+        data = await roblox_request(
+            "roblox_get_users_by_ids", "POST", ROBLOX_USERS_BATCH_API, json=payload
+        )
+        if data is None:
+            return None
+        for user in data.get("data", []):
+            found[user["id"]] = user["name"]
+    # ID 기준 조회라 현재 닉네임이 확실하므로 캐시 갱신
+    remember_usernames({name: user_id for user_id, name in found.items()})
+    return found
+
+
+async def roblox_get_user_ids_by_usernames(
+    usernames: list[str],
+) -> Optional[dict[str, tuple[int, str]]]:
+    """닉네임 목록을 100개씩 일괄 조회 → {소문자 닉네임: (id, 닉네임)}"""
+    found: dict[str, tuple[int, str]] = {}
+    for i in range(0, len(usernames), ROBLOX_BATCH_SIZE):
+        payload = {
+            "usernames": usernames[i : i + ROBLOX_BATCH_SIZE],
+            "excludeBannedUsers": True,
+        }
+        data = await roblox_request(
+            "roblox_get_user_ids_by_usernames", "POST", ROBLOX_USERNAME_API, json=payload
+        )
+        if data is None:
+            return None
+        for user in data.get("data", []):
+            found[user["requestedUsername"].lower()] = (user["id"], user["name"])
+    remember_usernames({name: user_id for user_id, name in found.values()})
+    return found
+
+
+async def get_rank_name(user_id: int, group_id: int) -> Optional[str]:
+    """캐시가 유효하면 캐시, 아니면 Roblox에서 랭크 조회"""
+    hit, rank_name = get_cached_rank(user_id, group_id)
+    if hit:
+        return rank_name
+    return await roblox_get_group_rank_by_user_id(user_id, group_id)
+
+
+# ---------- 인증 처리 ----------
+
+
+def format_verified_nick(roblox_nick: str, rank_name: Optional[str]) -> str:
+    nick = f"[{rank_name}] {roblox_nick}" if rank_name else roblox_nick
+    return nick[:32]  # 디스코드 닉네임 최대 길이
+
+
+def can_change_nick(member: discord.Member) -> bool:
+    """봇이 이 멤버의 닉네임을 바꿀 수 있는지 (서버 소유자나 봇보다 높은 역할은 불가)"""
+    me = member.guild.me
+    return (
+        me is not None
+        and me.guild_permissions.manage_nicknames
+        and member.id != member.guild.owner_id
+        and member.top_role < me.top_role
+    )
+
+
+async def apply_member_update(
+    member: discord.Member,
+    *,
+    add_role: Optional[discord.Role] = None,
+    nick: Optional[str] = None,
+    reason: Optional[str] = None,
+) -> bool:
+    """역할 추가와 닉네임 변경을 한 번의 REST 호출로 적용 → 실제로 호출했으면 True
+
+    이미 반영된 값은 빼고, 바뀌는 게 없으면 호출하지 않음
+    역할만 추가할 때는 add_roles(역할 하나 PUT)를 써서 캐시가 오래돼도 다른 봇/관리자가
+    바꾼 역할을 덮어쓰지 않고, 닉네임과 함께 바꿀 때만 전체 역할 목록 PATCH를 사용"""
+    need_role = add_role is not None and add_role not in member.roles
+    need_nick = nick is not None and member.nick != nick and can_change_nick(member)
+    if need_role and not need_nick:
+        await member.add_roles(add_role, reason=reason)
+    elif need_nick:
+        changes: dict = {"nick": nick}
+        if need_role:
+            changes["roles"] = [*member.roles[1:], add_role]  # roles[0]은 @everyone
+        await member.edit(**changes, reason=reason)
+    else:
+        return False
+    return True
+
+
+def get_identity(discord_id: int) -> Optional[tuple[int, str]]:
+    """다른 서버에서 인증된 기록 → (roblox_user_id, roblox_nick)"""
+    cursor.execute(
+        "SELECT roblox_user_id, roblox_nick FROM identities WHERE discord_id=?", (discord_id,)
+    )
+    return cursor.fetchone()
+
+
+def forget_identity(discord_id: Optional[int] = None) -> None:
+    """인증 해제/초기화 시 재사용 기록도 삭제 (None이면 전체), 커밋은 호출한 쪽에서"""
+    if discord_id is None:
+        cursor.execute("DELETE FROM identities")
+    else:
+        cursor.execute("DELETE FROM identities WHERE discord_id=?", (discord_id,))
+
+
+def get_guild_identity_reuse(guild_id: int) -> bool:
+    cursor.execute("SELECT identity_reuse FROM settings WHERE guild_id=?", (guild_id,))
+    row = cursor.fetchone()
+    return bool(row and row[0])
+
+
+def set_guild_identity_reuse(guild_id: int, enabled: bool) -> None:
+    cursor.execute(
+        """INSERT INTO settings(guild_id, identity_reuse)
+           VALUES(?, ?)
+           ON CONFLICT(guild_id) DO UPDATE SET identity_reuse=excluded.identity_reuse""",
+        (guild_id, int(enabled)),
+    )
+    conn.commit()
+
+
+async def complete_verification(
+    guild: discord.Guild,
+    member: discord.Member,
+    role: discord.Role,
+    roblox_nick: str,
+    roblox_user_id: int,
+) -> None:
+    """역할/닉네임 적용 후 users, identities, stats에 인증 완료 기록"""
+    # 랭크를 먼저 가져와서 역할과 닉네임을 한 번에 적용
+    group_id = get_guild_group_id(guild.id) or DEFAULT_GROUP_ID
+    rank_name = await get_rank_name(roblox_user_id, group_id)
+    await apply_member_update(
+        member, add_role=role, nick=format_verified_nick(roblox_nick, rank_name)
+    )
+
+    # 랭크 조회가 실패했으면 (캐시 안 됨) 그룹을 비워 재입장 때 다시 조회
+    rank_group_id = group_id if get_cached_rank(roblox_user_id, group_id)[0] else None
+    now_str = datetime.now().isoformat()
+    cursor.execute(
+        """INSERT INTO users(discord_id, guild_id, roblox_nick, roblox_user_id,
+           expire_time, verified, rank_name, rank_group_id)
+           VALUES(?,?,?,?,?,1,?,?)
+           ON CONFLICT(discord_id, guild_id) DO UPDATE SET
+               roblox_nick=excluded.roblox_nick,
+               roblox_user_id=excluded.roblox_user_id,
+               verified=1,
+               rank_name=excluded.rank_name,
+               rank_group_id=excluded.rank_group_id""",
+        (member.id, guild.id, roblox_nick, roblox_user_id, now_str, rank_name, rank_group_id),
+    )
+    cursor.execute(
+        """INSERT INTO identities(discord_id, roblox_user_id, roblox_nick, verified_at)
+           VALUES(?,?,?,?)
+           ON CONFLICT(discord_id) DO UPDATE SET
+               roblox_user_id=excluded.roblox_user_id,
+               roblox_nick=excluded.roblox_nick,
+               verified_at=excluded.verified_at""",
+        (member.id, roblox_user_id, roblox_nick, now_str),
+    )
+    cursor.execute("INSERT OR IGNORE INTO stats(guild_id) VALUES(?)", (guild.id,))
+    cursor.execute(
+        "UPDATE stats SET verify_count = verify_count + 1 WHERE guild_id=?", (guild.id,)
+    )
+    conn.commit()
+
+    nick_index_add(guild.id, member.id, roblox_nick)
+    verify_timestamps.setdefault(guild.id, deque(maxlen=VERIFY_TIMESTAMPS_PER_GUILD)).append(
+        time.time()
+    )
+    mark_status_dirty(guild.id)
+
+
+# ---------- View ----------
+
+
+class VerifyButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"verify:(?P<guild_id>[0-9]+):(?P<code>[A-Z0-9]+)",
+):
+    """재시작 후에도 동작하는 인증 버튼
+
+    custom_id에 길드 ID와 인증 코드(시도마다 바뀌는 nonce)만 담고
+    나머지 상태는 누를 때 DB에서 읽으므로 대기 중인 유저 수만큼 메모리를 쓰지 않음
+    """
+
+    def __init__(self, guild_id: int, code: str):
+        super().__init__(
+            discord.ui.Button(
+                label="인증하기",
+                style=discord.ButtonStyle.green,
+                custom_id=f"verify:{guild_id}:{code}",
+            )
+        )
+        self.guild_id = guild_id
+        self.code = code
+
+    @classmethod
+    async def from_custom_id(
+        cls,
+        interaction: discord.Interaction,
+        item: discord.ui.Button,
+        match: re.Match[str],
+    ):
+        return cls(int(match["guild_id"]), match["code"])
+
+    async def callback(self, interaction: discord.Interaction):
+        if interaction is None:
+            return
+        roblox_priority.set("interactive")
+        with traced("button:인증하기", guild_id=self.guild_id, user_id=interaction.user.id):
+            await self.verify(interaction)
+
+    async def verify(self, interaction: discord.Interaction):
+        try:
+            guild = bot.get_guild(self.guild_id)
+            if guild is None:
+                if not interaction.response.is_done():
+                    await interaction.response.send_message(
+                        "❌ 서버 정보를 불러올 수 없습니다.", ephemeral=True
+                    )
+                return
+
+            cursor.execute(
+                "SELECT roblox_nick, roblox_user_id, expire_time, code FROM users WHERE discord_id=? AND guild_id=?",
+                (interaction.user.id, self.guild_id),
+            )
+            data = cursor.fetchone()
+
+            if not data:
+                if not interaction.response.is_done():
+                    await interaction.response.send_message(
+                        "❌ 인증 정보가 없습니다. 다시 /인증 명령어를 실행해주세요.",
+                        ephemeral=True,
+                    )
+                return
+
+            nick, roblox_user_id, expire_str, saved_code = data
+            expire = datetime.fromisoformat(expire_str)
+
+            if datetime.now() > expire:
+                if not interaction.response.is_done():
+                    await interaction.response.send_message(
+                        "❌ 인증 시간이 만료되었습니다. 다시 /인증 명령어를 실행해주세요.",
+                        ephemeral=True,
+                    )
+                return
+
+            if saved_code != self.code:
+                if not interaction.response.is_done():
+                    await interaction.response.send_message(
+                        "❌ 코드가 일치하지 않습니다.", ephemeral=True
+                    )
+                return
+
+            if not roblox_user_id:
+                if not interaction.response.is_done():
+                    await interaction.response.send_message(
+                        "❌ Roblox 계정 정보가 없습니다. 다시 /인증 명령어를 실행해주세요.",
+                        ephemeral=True,
+                    )
+                return
 
             description = await roblox_get_description_by_user_id(roblox_user_id)
             if description is None:
@@ -364,50 +1616,348 @@ class VerifyView(discord.ui.View):
                     )
                 return
 
-            await member.add_roles(role)
-
-            # 로블록스 그룹 랭크 가져오기 후 닉네임 변경
-            try:
-                rank_name = await roblox_get_group_rank_by_user_id(roblox_user_id)
-
-                if rank_name:
-                    await member.edit(nick=f"[{rank_name}] {nick}")
-                else:
-                    await member.edit(nick=nick)
-            except discord.Forbidden:
-                pass
-
-            cursor.execute(
-                "UPDATE users SET verified=1 WHERE discord_id=? AND guild_id=?",
-                (interaction.user.id, self.guild_id),
-            )
-            cursor.execute(
-                "INSERT OR IGNORE INTO stats(guild_id) VALUES(?)", (self.guild_id,)
-            )
-            cursor.execute(
-                "UPDATE stats SET verify_count = verify_count + 1 WHERE guild_id=?",
-                (self.guild_id,),
-            )
-            conn.commit()
+            await complete_verification(guild, member, role, nick, roblox_user_id)
 
             if not interaction.response.is_done():
-                await interaction.response.send_message("✅ 인증 완료!", ephemeral=True)
+                with span("discord response"):
+                    await interaction.response.send_message("✅ 인증 완료!", ephemeral=True)
 
         except Exception as e:
-            print("verify_button error:", repr(e))
-            add_error_log(f"verify_button: {repr(e)}")
+            add_error_log(
+                f"verify_button: {repr(e)}",
+                verify_log,
+                guild_id=self.guild_id,
+                user_id=interaction.user.id,
+            )
             if not interaction.response.is_done():
                 await interaction.response.send_message(
                     "❌ 내부 오류가 발생했습니다.", ephemeral=True
                 )
 
 
+USER_SEARCH_PAGE_SIZE = 10
+
+
+def fetch_user_search_page(
+    guild_id: int,
+    keyword: str,
+    member_id: int,
+    after: Optional[tuple[str, int]] = None,
+    before: Optional[tuple[str, int]] = None,
+) -> tuple[list[tuple[int, str, int]], bool]:
+    """(roblox_nick, discord_id) 기준 키셋 페이지 조회 → (행 목록, 해당 방향으로 더 있는지)"""
+    sql = (
+        "SELECT discord_id, roblox_nick, verified FROM users "
+        "WHERE guild_id=? AND (roblox_nick LIKE ? OR discord_id=?)"
+    )
+    params: list = [guild_id, f"%{keyword}%", member_id]
+
+    if before is not None:
+        sql += " AND (roblox_nick, discord_id) < (?, ?) ORDER BY roblox_nick DESC, discord_id DESC"
+        params.extend(before)
+    else:
+        if after is not None:
+            sql += " AND (roblox_nick, discord_id) > (?, ?)"
+            params.extend(after)
+        sql += " ORDER BY roblox_nick, discord_id"
+
+    # 한 행을 더 읽어서 다음 페이지 존재 여부 확인
+    sql += " LIMIT ?"
+    params.append(USER_SEARCH_PAGE_SIZE + 1)
+
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    has_more = len(rows) > USER_SEARCH_PAGE_SIZE
+    rows = rows[:USER_SEARCH_PAGE_SIZE]
+    if before is not None:
+        rows.reverse()
+    return rows, has_more
+
+
+class UserSearchView(discord.ui.View):
+    def __init__(self, author_id: int, guild_id: int, keyword: str, member_id: int):
+        super().__init__(timeout=180)
+        self.author_id = author_id
+        self.guild_id = guild_id
+        self.keyword = keyword
+        self.member_id = member_id
+        self.page = 1
+        self.rows: list[tuple[int, str, int]] = []
+
+    def load(
+        self,
+        after: Optional[tuple[str, int]] = None,
+        before: Optional[tuple[str, int]] = None,
+    ) -> None:
+        rows, has_more = fetch_user_search_page(
+            self.guild_id, self.keyword, self.member_id, after=after, before=before
+        )
+        if before is not None:
+            self.page -= 1
+            self.prev_button.disabled = not has_more
+            self.next_button.disabled = False
+        else:
+            if after is not None:
+                self.page += 1
+            self.prev_button.disabled = self.page <= 1
+            self.next_button.disabled = not has_more
+        self.rows = rows
+
+    def build_embed(self) -> discord.Embed:
+        embed = discord.Embed(title="유저 검색 결과", color=discord.Color.blurple())
+        if not self.rows:
+            # 페이지를 넘기는 사이 행이 삭제된 경우 등
+            embed.description = "❌ 검색 결과가 없습니다."
+        for discord_id, roblox_nick, verified in self.rows:
+            status = "✅ 인증된 유저 입니다." if verified else "❌ 미인증 유저 입니다."
+            embed.add_field(
+                name=roblox_nick,
+                value=f"Discord ID: {discord_id}\n상태: {status}",
+                inline=False,
+            )
+        embed.set_footer(text=f"페이지 {self.page}")
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message(
+                "❌ 명령어 실행자만 사용할 수 있습니다.", ephemeral=True
+            )
+            return False
+        return True
+
+    @discord.ui.button(label="◀ 이전", style=discord.ButtonStyle.secondary)
+    async def prev_button(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
+        if self.rows:
+            first_id, first_nick, _ = self.rows[0]
+            self.load(before=(first_nick, first_id))
+        else:
+            # 빈 페이지에서는 기준 행이 없으므로 첫 페이지부터 다시
+            self.page = 1
+            self.load()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    @discord.ui.button(label="다음 ▶", style=discord.ButtonStyle.secondary)
+    async def next_button(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
+        if self.rows:
+            last_id, last_nick, _ = self.rows[-1]
+            self.load(after=(last_nick, last_id))
+        else:
+            self.page = 1
+            self.load()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+
+class VerifyView(discord.ui.View):
+    def __init__(self, guild_id: int, code: str):
+        super().__init__(timeout=None)
+        self.add_item(VerifyButton(guild_id, code))
+
+
+# ---------- 재시도 큐 ----------
+
+
+RETRY_INTERVAL = 30  # 초
+RETRY_BATCH = 50
+RETRY_BASE_DELAY = 60  # 초, 시도마다 2배
+RETRY_MAX_DELAY = 6 * 3600
+RETRY_MAX_ATTEMPTS = 8
+RETRY_DEAD_RETENTION_DAYS = 7  # 영구 실패 항목 보관 기간 (/재시도목록 확인용)
+
+
+def is_transient_error(e: BaseException) -> bool:
+    """다시 시도하면 성공할 수 있는 오류인지 (429, 5xx, 타임아웃, 네트워크)"""
+    if isinstance(e, discord.HTTPException):
+        return e.status == 429 or e.status >= 500
+    return isinstance(e, (asyncio.TimeoutError, aiohttp.ClientError, OSError))
+
+
+def retry_delay(attempts: int) -> float:
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempts)
+    return delay * random.uniform(0.8, 1.2)  # 한꺼번에 몰리지 않도록
+
+
+def enqueue_retry(
+    guild_id: int, kind: str, target_id: int, payload: dict, error: BaseException
+) -> bool:
+    """실패한 작업 기록 → 재시도 대상이면 True (영구 실패는 바로 dead)
+
+    역할/닉네임은 같은 (서버, 종류, 대상) 항목이 있으면 최신 내용으로 덮어쓰고
+    DM은 공지마다 따로 쌓음"""
+    transient = is_transient_error(error)
+    now = time.time()
+    cursor.execute(
+        """INSERT INTO retry_queue(guild_id, kind, target_id, payload, error,
+           status, next_attempt_at, created_at)
+           VALUES(?,?,?,?,?,?,?,?)
+           ON CONFLICT(guild_id, kind, target_id) WHERE kind != 'dm' DO UPDATE SET
+               payload=excluded.payload,
+               error=excluded.error,
+               status=excluded.status,
+               attempts=0,
+               next_attempt_at=excluded.next_attempt_at""",
+        (
+            guild_id,
+            kind,
+            target_id,
+            json.dumps(payload, ensure_ascii=False),
+            type(error).__name__,
+            "pending" if transient else "dead",
+            now + retry_delay(0),
+            now,
+        ),
+    )
+    conn.commit()
+    return transient
+
+
+async def perform_retry(guild: discord.Guild, kind: str, target_id: int, payload: dict) -> None:
+    """kind별 작업 다시 실행 (실패하면 예외 그대로 전달)"""
+    if kind == "dm":
+        user = await bot.fetch_user(target_id)
+        await user.send(embed=discord.Embed.from_dict(payload["embed"]))
+        return
+
+    member = guild.get_member(target_id) or await guild.fetch_member(target_id)
+    await member_edit_limiter.acquire()
+    if kind == "add_role":
+        role = guild.get_role(payload["role_id"])
+        if role is None:
+            raise LookupError("인증 역할이 삭제됨")
+        await apply_member_update(member, add_role=role, reason=payload.get("reason"))
+    elif kind == "nick":
+        await apply_member_update(member, nick=payload["nick"], reason=payload.get("reason"))
+    else:
+        raise ValueError(f"unknown retry kind: {kind}")
+
+
+async def process_retry_item(
+    item_id: int, guild_id: int, kind: str, target_id: int, payload: str, attempts: int
+) -> None:
+    guild = bot.get_guild(guild_id)
+    if guild is None:
+        cursor.execute("DELETE FROM retry_queue WHERE id=?", (item_id,))
+        conn.commit()
+        return
+
+    try:
+        await perform_retry(guild, kind, target_id, json.loads(payload))
+    except Exception as e:
+        attempts += 1
+        dead = not is_transient_error(e) or attempts >= RETRY_MAX_ATTEMPTS
+        cursor.execute(
+            """UPDATE retry_queue SET attempts=?, error=?, status=?, next_attempt_at=?
+               WHERE id=?""",
+            (
+                attempts,
+                type(e).__name__,
+                "dead" if dead else "pending",
+                time.time() + retry_delay(attempts),
+                item_id,
+            ),
+        )
+        if dead:
+            task_log.warning(
+                f"재시도 포기: {kind} target={target_id} ({e!r})",
+                extra={"guild_id": guild_id},
+            )
+    else:
+        cursor.execute("DELETE FROM retry_queue WHERE id=?", (item_id,))
+    conn.commit()
+
+
+@tasks.loop(seconds=RETRY_INTERVAL)
+async def retry_worker():
+    # DB 오류로 루프 자체가 멈추지 않도록 항목마다 잡아서 기록
+    try:
+        cursor.execute(
+            """SELECT id, guild_id, kind, target_id, payload, attempts FROM retry_queue
+               WHERE status='pending' AND next_attempt_at <= ?
+               ORDER BY next_attempt_at LIMIT ?""",
+            (time.time(), RETRY_BATCH),
+        )
+        items = cursor.fetchall()
+    except sqlite3.Error as e:
+        add_error_log(f"retry_worker: {repr(e)}", task_log)
+        return
+
+    for item in items:
+        try:
+            await process_retry_item(*item)
+        except sqlite3.Error as e:
+            add_error_log(f"retry_worker (id={item[0]}): {repr(e)}", task_log, guild_id=item[1])
+
+
+def prune_dead_retries() -> int:
+    """보관 기간이 지난 영구 실패 항목 삭제 (next_attempt_at ≈ 마지막 실패 시각)"""
+    cutoff = time.time() - RETRY_DEAD_RETENTION_DAYS * 86400
+    cursor.execute(
+        "DELETE FROM retry_queue WHERE status='dead' AND next_attempt_at < ?", (cutoff,)
+    )
+    conn.commit()
+    return cursor.rowcount
+
+
+RETRY_KIND_NAMES = {"dm": "DM", "add_role": "역할 부여", "nick": "닉네임"}
+
+
+@bot.tree.command(name="재시도목록", description="실패한 작업의 재시도 현황을 확인합니다. (관리자)")
+@app_commands.describe(비우기="영구 실패(dead) 목록 삭제")
+async def retry_queue_status(interaction: discord.Interaction, 비우기: bool = False):
+    if not (is_owner(interaction.user.id) or is_admin(interaction.user)):
+        await interaction.response.send_message("❌ 관리자만 사용할 수 있습니다.", ephemeral=True)
+        return
+
+    guild_id = interaction.guild.id
+    if 비우기:
+        cursor.execute(
+            "DELETE FROM retry_queue WHERE guild_id=? AND status='dead'", (guild_id,)
+        )
+        conn.commit()
+        await interaction.response.send_message(
+            f"✅ 영구 실패 {cursor.rowcount}건을 삭제했습니다.", ephemeral=True
+        )
+        return
+
+    cursor.execute(
+        "SELECT status, COUNT(*) FROM retry_queue WHERE guild_id=? GROUP BY status",
+        (guild_id,),
+    )
+    counts = dict(cursor.fetchall())
+    cursor.execute(
+        """SELECT kind, target_id, error, attempts FROM retry_queue
+           WHERE guild_id=? AND status='dead' ORDER BY id DESC LIMIT 15""",
+        (guild_id,),
+    )
+    dead_rows = cursor.fetchall()
+
+    embed = discord.Embed(title="재시도 큐", color=discord.Color.blurple())
+    embed.add_field(name="재시도 대기", value=f"{counts.get('pending', 0)}건", inline=True)
+    embed.add_field(name="영구 실패", value=f"{counts.get('dead', 0)}건", inline=True)
+    if dead_rows:
+        embed.add_field(
+            name="최근 영구 실패",
+            value="\n".join(
+                f"{RETRY_KIND_NAMES.get(kind, kind)} <@{target_id}> · `{error}` · {attempts}회 재시도"
+                for kind, target_id, error, attempts in dead_rows
+            ),
+            inline=False,
+        )
+
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
 # ---------- 명령어 ----------
 
 
 @bot.tree.command(name="인증", description="로블록스 계정 인증을 시작합니다.")
 @app_commands.describe(로블닉="로블록스 닉네임")
 async def verify(interaction: discord.Interaction, 로블닉: str):
+    roblox_priority.set("interactive")
     await interaction.response.defer(ephemeral=True)
 
     role_id = get_guild_role_id(interaction.guild.id)
@@ -427,6 +1977,23 @@ async def verify(interaction: discord.Interaction, 로블닉: str):
         await interaction.followup.send("이미 인증된 사용자입니다.", ephemeral=True)
         return
 
+    # 다른 서버에서 같은 로블록스 계정으로 인증했다면 (서버가 허용한 경우) 바로 완료
+    if get_guild_identity_reuse(interaction.guild.id):
+        identity = get_identity(interaction.user.id)
+        role = interaction.guild.get_role(role_id)
+        if identity and role and identity[1].casefold() == 로블닉.casefold():
+            try:
+                await complete_verification(
+                    interaction.guild, interaction.user, role, identity[1], identity[0]
+                )
+            except discord.Forbidden:
+                await interaction.followup.send("⚠ 역할 부여 권한 없음", ephemeral=True)
+                return
+            await interaction.followup.send(
+                "✅ 다른 서버의 인증 기록으로 인증을 완료했습니다.", ephemeral=True
+            )
+            return
+
     user_id = await roblox_get_user_id_by_username(로블닉)
     if not user_id:
         await interaction.followup.send(
@@ -438,12 +2005,19 @@ async def verify(interaction: discord.Interaction, 로블닉: str):
     expire_time = datetime.now() + timedelta(minutes=5)
 
     cursor.execute(
-        """INSERT OR REPLACE INTO users(discord_id, guild_id, roblox_nick,
+        """INSERT INTO users(discord_id, guild_id, roblox_nick,
            roblox_user_id, code, expire_time, verified)
-           VALUES(?,?,?,?,?,?,0)""",
+           VALUES(?,?,?,?,?,?,0)
+           ON CONFLICT(discord_id, guild_id) DO UPDATE SET
+               roblox_nick=excluded.roblox_nick,
+               roblox_user_id=excluded.roblox_user_id,
+               code=excluded.code,
+               expire_time=excluded.expire_time,
+               verified=0""",
         (interaction.user.id, interaction.guild.id, 로블닉, user_id, code, expire_time.isoformat()),
     )
     conn.commit()
+    mark_status_dirty(interaction.guild.id)
 
     embed = discord.Embed(title="로블록스 인증", color=discord.Color.blue())
     embed.description = (
@@ -459,7 +2033,7 @@ async def verify(interaction: discord.Interaction, 로블닉: str):
 
     try:
         await interaction.user.send(
-            embed=embed, view=VerifyView(code, expire_time, interaction.guild.id)
+            embed=embed, view=VerifyView(interaction.guild.id, code)
         )
         await interaction.followup.send("📩 DM을 확인해주세요.", ephemeral=True)
     except discord.Forbidden:
@@ -469,18 +2043,42 @@ async def verify(interaction: discord.Interaction, 로블닉: str):
 
 
 @bot.tree.command(name="인증해제", description="유저 인증 해제 (관리자)")
-@app_commands.describe(유저="해제할 유저")
-async def unverify(interaction: discord.Interaction, 유저: discord.Member):
+@app_commands.describe(유저="해제할 유저", 로블닉="해제할 유저의 로블록스 닉네임")
+@app_commands.autocomplete(로블닉=roblox_nick_autocomplete)
+async def unverify(
+    interaction: discord.Interaction,
+    유저: Optional[discord.Member] = None,
+    로블닉: Optional[str] = None,
+):
     if not is_admin(interaction.user):
         await interaction.response.send_message("❌ 관리자만 사용할 수 있습니다.", ephemeral=True)
         return
 
-    await interaction.response.defer(ephemeral=True)
-
+    if 유저 is not None:
+        target_id = 유저.id
+    elif 로블닉:
+        target_id = get_nick_index(interaction.guild.id).find(로블닉)
+        if target_id is None:
+            await interaction.response.send_message(
+                "❌ 해당 로블닉으로 인증된 유저를 찾을 수 없습니다.", ephemeral=True
+            )
+            return
+        유저 = interaction.guild.get_member(target_id)
+    else:
+        await interaction.response.send_message(
+            "❌ 유저 또는 로블닉을 입력해주세요.", ephemeral=True
+        )
+        return
+
+    await interaction.response.defer(ephemeral=True)
+
     cursor.execute(
         "UPDATE users SET verified=0 WHERE discord_id=? AND guild_id=?",
-        (유저.id, interaction.guild.id),
+        (target_id, interaction.guild.id),
     )
+    # 해제된 인증이 다른 서버(또는 이 서버)의 재사용으로 바로 복구되지 않도록
+    forget_identity(target_id)
+    nick_index_remove(interaction.guild.id, target_id)
     cursor.execute(
         "INSERT OR IGNORE INTO stats(guild_id) VALUES(?)", (interaction.guild.id,)
     )
@@ -492,14 +2090,14 @@ async def unverify(interaction: discord.Interaction, 유저: discord.Member):
 
     role_id = get_guild_role_id(interaction.guild.id)
     role = interaction.guild.get_role(role_id) if role_id else None
-    if role and role in 유저.roles:
+    if 유저 is not None and role and role in 유저.roles:
         try:
             await 유저.remove_roles(role, reason="인증 해제")
         except discord.Forbidden:
             await interaction.followup.send("⚠ 역할 제거 권한 없음", ephemeral=True)
             return
 
-    await interaction.followup.send(f"✅ {유저.mention} 인증 해제 완료", ephemeral=True)
+    await interaction.followup.send(f"✅ <@{target_id}> 인증 해제 완료", ephemeral=True)
 
 
 @bot.tree.command(name="설정", description="인증 역할 설정 (관리자)")
@@ -521,6 +2119,20 @@ async def configure(interaction: discord.Interaction, 역할: discord.Role):
         f"✅ 인증 역할을 {역할.mention}로 설정했습니다.", ephemeral=True
     )
 
+@bot.tree.command(
+    name="통합인증", description="다른 서버의 인증 기록으로 바로 인증하도록 허용합니다. (관리자)"
+)
+@app_commands.describe(사용="통합 인증 사용 여부")
+async def set_identity_reuse(interaction: discord.Interaction, 사용: bool):
+    if not is_admin(interaction.user):
+        await interaction.response.send_message("❌ 관리자만 사용할 수 있습니다.", ephemeral=True)
+        return
+
+    set_guild_identity_reuse(interaction.guild.id, 사용)
+    await interaction.response.send_message(
+        f"✅ 통합 인증을 {'켰습니다' if 사용 else '껐습니다'}.", ephemeral=True
+    )
+
 @bot.tree.command(name="그룹지정", description="로블록스 그룹 ID를 설정합니다. (개발자)")
 @app_commands.describe(그룹아이디="로블록스 그룹 ID (숫자)")
 async def set_group_id(interaction: discord.Interaction, 그룹아이디: int):
@@ -561,7 +2173,7 @@ async def set_admin_roles(
 
     # 🔻 인자 비우면 → 전체 관리자 역할 해제
     if 역할들 is None:
-        set_guild_admin_role_id(guild.id, None)   # 내부 구현을: 여러 개 저장/삭제로 바꿔도 됨
+        set_guild_admin_role_ids(guild.id, [])
         await interaction.response.send_message(
             "✅ 관리자 역할 설정을 해제했습니다.", ephemeral=True
         )
@@ -597,8 +2209,7 @@ async def set_admin_roles(
             role_ids.append(role.id)
             mentions.append(role.mention)
 
-    # 🔻 여기서 여러 개 한 번에 저장하도록, 내부 구현을 리스트/JSON 등으로 바꾸면 됨
-    set_guild_admin_role_id(guild.id, role_ids)
+    set_guild_admin_role_ids(guild.id, role_ids)
 
     await interaction.response.send_message(
         "✅ 관리자 역할을 다음 역할들로 설정했습니다:\n" + ", ".join(mentions),
@@ -681,10 +2292,7 @@ async def server_info(interaction: discord.Interaction):
         )
         return
 
-    cursor.execute(
-        "SELECT COUNT(*) FROM users WHERE guild_id=? AND verified=1", (guild.id,)
-    )
-    verified_count = cursor.fetchone()[0]
+    verified_count = get_guild_counters(guild.id)[1]
 
     embed = discord.Embed(
         title="서버 정보",
@@ -747,7 +2355,7 @@ async def command_list(interaction: discord.Interaction):
         name="🔐 인증 / 기본 설정",
         value=(
             "`/인증` `/인증해제` `/인증확인`\n"
-            "`/설정` `/그룹지정`\n"
+            "`/설정` `/그룹지정` `/통합인증`\n"
             "`/관리자지정`"
         ),
         inline=False,
@@ -767,7 +2375,7 @@ async def command_list(interaction: discord.Interaction):
     # 👨‍💼 관리자 전용
     embed.add_field(
         name="👨‍💼 관리자 명령어",
-        value="`/유저검색` `/일괄닉네임변경`",
+        value="`/유저검색` `/일괄닉네임변경`\n`/데이터내보내기` `/데이터가져오기`\n`/재시도목록`",
         inline=False,
     )
 
@@ -783,7 +2391,8 @@ async def command_list(interaction: discord.Interaction):
         name="📢 공지 / 관리 (개발자)",
         value=(
             "`/공지` `/백업생성`\n"
-            "`/오류로그` `/시스템정보`\n"
+            "`/오류로그` `/로그레벨` `/시스템정보`\n"
+            "`/루프지연` `/프로파일` `/트레이스` `/db정리` `/느린쿼리`\n"
             "`/봇상태` `/상태채널설정`\n"
             "`/봇랭크갱신` `/로그지우기`"
         ),
@@ -800,7 +2409,7 @@ async def command_list(interaction: discord.Interaction):
     # 🔁 동기화 / 확인 (개발자)
     embed.add_field(
         name="🔁 동기화 / 확인 (개발자)",
-        value="`/재동기화` `/확인` `/확인삭제`",
+        value="`/재동기화` `/자동동기화`\n`/확인` `/확인삭제`",
         inline=False,
     )
 
@@ -812,6 +2421,7 @@ async def command_list(interaction: discord.Interaction):
     name="유저검색", description="로블록스 또는 디스코드 유저를 검색합니다. (관리자)"
 )
 @app_commands.describe(검색어="로블닉 또는 디코 닉네임")
+@app_commands.autocomplete(검색어=roblox_nick_autocomplete)
 async def user_search(interaction: discord.Interaction, 검색어: str):
     if not is_admin(interaction.user):
         await interaction.response.send_message("❌ 관리자만 사용할 수 있습니다.", ephemeral=True)
@@ -822,27 +2432,14 @@ async def user_search(interaction: discord.Interaction, 검색어: str):
     member = interaction.guild.get_member_named(검색어)
     member_id = member.id if member else -1
 
-    cursor.execute(
-        "SELECT discord_id, roblox_nick, verified FROM users "
-        "WHERE guild_id=? AND (roblox_nick LIKE ? OR discord_id=?)",
-        (interaction.guild.id, f"%{검색어}%", member_id),
-    )
-    results = cursor.fetchall()
+    view = UserSearchView(interaction.user.id, interaction.guild.id, 검색어, member_id)
+    view.load()
 
-    if not results:
+    if not view.rows:
         await interaction.followup.send("❌ 검색 결과가 없습니다.", ephemeral=True)
         return
 
-    embed = discord.Embed(title="유저 검색 결과", color=discord.Color.blurple())
-    for discord_id, roblox_nick, verified in results:
-        status = "✅ 인증된 유저 입니다." if verified else "❌ 미인증 유저 입니다."
-        embed.add_field(
-            name=roblox_nick,
-            value=f"Discord ID: {discord_id}\n상태: {status}",
-            inline=False,
-        )
-
-    await interaction.followup.send(embed=embed, ephemeral=True)
+    await interaction.followup.send(embed=view.build_embed(), view=view, ephemeral=True)
 
 
 @bot.tree.command(
@@ -854,6 +2451,8 @@ async def bulk_nickname_update(interaction: discord.Interaction):
         return
 
     await interaction.response.defer(ephemeral=True)
+    # 랭크 조회가 많으므로 유저 인증 요청보다 뒤로 밀림
+    roblox_priority.set("background")
 
     # 🔹 여기 추가: 서버별 그룹 ID 가져오기
     group_id = get_guild_group_id(interaction.guild.id)
@@ -876,35 +2475,378 @@ async def bulk_nickname_update(interaction: discord.Interaction):
         return
 
     updated_count = 0
+    unchanged_count = 0
     failed_count = 0
+    retry_count = 0
 
     for discord_id, roblox_nick, roblox_user_id in users_data:
-        try:
-            member = interaction.guild.get_member(discord_id)
-            if member and roblox_user_id:
-                # 🔹 여기서도 group_id 넘겨주기
-                rank_name = await roblox_get_group_rank_by_user_id(
-                    roblox_user_id, group_id=group_id
-                )
+        member = interaction.guild.get_member(discord_id)
+        if not (member and roblox_user_id):
+            continue
 
-                if rank_name:
-                    await member.edit(nick=f"[{rank_name}] {roblox_nick}")
-                else:
-                    await member.edit(nick=roblox_nick)
-                updated_count += 1
-        except discord.Forbidden:
+        # 🔹 여기서도 group_id 넘겨주기
+        rank_name = await roblox_get_group_rank_by_user_id(roblox_user_id, group_id=group_id)
+        if get_cached_rank(roblox_user_id, group_id)[0]:  # API 오류면 마지막 랭크 유지
+            save_member_rank(interaction.guild.id, discord_id, group_id, rank_name)
+        nick = format_verified_nick(roblox_nick, rank_name)
+        if member.nick != nick and not can_change_nick(member):
+            # 서버 소유자나 봇보다 높은 역할은 변경 불가 → 실패로 집계
             failed_count += 1
+            continue
+        try:
+            # 이미 같은 닉네임이면 호출 생략
+            if await apply_member_update(member, nick=nick):
+                updated_count += 1
+            else:
+                unchanged_count += 1
         except Exception as e:
-            print(f"닉네임 변경 실패 (discord_id={discord_id}): {repr(e)}")
-            failed_count += 1
+            command_log.warning(
+                f"닉네임 변경 실패: {repr(e)}",
+                extra={**interaction_log_context(interaction), "user_id": discord_id},
+            )
+            if enqueue_retry(
+                interaction.guild.id, "nick", discord_id, {"nick": nick, "reason": "닉네임 갱신"}, e
+            ):
+                retry_count += 1
+            else:
+                failed_count += 1
+
+    conn.commit()
 
     result_text = f"✅ {updated_count}명의 닉네임을 갱신했습니다."
+    if unchanged_count > 0:
+        result_text += f"\n변경 없음: {unchanged_count}명"
+    if retry_count > 0:
+        result_text += f"\n🔁 {retry_count}명은 일시적 오류로 자동 재시도 예정"
     if failed_count > 0:
         result_text += f"\n⚠ {failed_count}명 변경 실패 (권한 부족 등)"
 
     await interaction.followup.send(result_text, ephemeral=True)
 
 
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_COLUMNS = ("discord_id", "roblox_nick", "roblox_user_id", "verified", "expire_time")
+
+
+def write_guild_export(guild_id: int, path: str, fmt: str, compress: bool) -> int:
+    """users 행을 청크 단위로 읽어 파일에 기록 (스레드에서 실행)"""
+    # 메인 커넥션과 섞이지 않도록 내보내기 전용 커넥션 사용
+    export_conn = sqlite3.connect(DB_PATH, factory=TracedConnection)
+    try:
+        export_cursor = export_conn.cursor().execute(
+            f"SELECT {', '.join(EXPORT_COLUMNS)} FROM users WHERE guild_id=?",
+            (guild_id,),
+        )
+        opener = gzip.open if compress else open
+        count = 0
+        with opener(path, "wt", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f) if fmt == "csv" else None
+            if writer:
+                writer.writerow(EXPORT_COLUMNS)
+            while True:
+                rows = export_cursor.fetchmany(EXPORT_CHUNK_SIZE)
+                if not rows:
+                    break
+                if writer:
+                    writer.writerows(rows)
+                else:
+                    f.writelines(
+                        json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n"
+                        for row in rows
+                    )
+                count += len(rows)
+        return count
+    finally:
+        export_conn.close()
+
+
+@bot.tree.command(
+    name="데이터내보내기", description="서버의 인증 데이터를 파일로 내보냅니다. (관리자)"
+)
+@app_commands.describe(형식="파일 형식 (csv/jsonl)", 압축="gzip 압축 여부")
+async def export_users(
+    interaction: discord.Interaction, 형식: str = "csv", 압축: bool = False
+):
+    if not (is_owner(interaction.user.id) or is_admin(interaction.user)):
+        await interaction.response.send_message("❌ 관리자만 사용할 수 있습니다.", ephemeral=True)
+        return
+
+    guild = interaction.guild
+    if guild is None:
+        await interaction.response.send_message("길드에서만 사용할 수 있습니다.", ephemeral=True)
+        return
+
+    fmt = 형식.lower()
+    if fmt not in ("csv", "jsonl"):
+        await interaction.response.send_message(
+            "❌ 형식은 'csv', 'jsonl' 중 하나여야 합니다.", ephemeral=True
+        )
+        return
+
+    await interaction.response.defer(ephemeral=True, thinking=True)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"users_{guild.id}_{timestamp}.{fmt}" + (".gz" if 압축 else "")
+
+    fd, tmp_path = tempfile.mkstemp(suffix=f"_{filename}")
+    os.close(fd)
+    try:
+        row_count = await asyncio.to_thread(write_guild_export, guild.id, tmp_path, fmt, 압축)
+
+        file_size = os.path.getsize(tmp_path)
+        if file_size > guild.filesize_limit:
+            await interaction.followup.send(
+                f"❌ 파일 크기({file_size / 1024 / 1024:.1f} MB)가 업로드 제한을 넘습니다. "
+                "압축 옵션을 사용해주세요.",
+                ephemeral=True,
+            )
+            return
+
+        await interaction.followup.send(
+            f"✅ {row_count}명의 데이터를 내보냈습니다.",
+            file=discord.File(tmp_path, filename=filename),
+            ephemeral=True,
+        )
+    except Exception as e:
+        add_error_log(f"export_users: {repr(e)}")
+        await interaction.followup.send("❌ 내보내기 중 오류가 발생했습니다.", ephemeral=True)
+    finally:
+        os.remove(tmp_path)
+
+
+IMPORT_CHUNK_SIZE = 500
+IMPORT_MAX_BYTES = 20 * 1024 * 1024
+
+
+def parse_import_rows(
+    data: bytes, filename: str
+) -> tuple[list[tuple[int, Optional[int], Optional[str]]], int, int]:
+    """가져오기 파일 파싱 → ([(discord_id, roblox_user_id, roblox_nick)], 잘못된 행 수, 미인증 행 수)
+
+    내보내기 파일처럼 verified 값이 있는 행은 1일 때만 가져옴 (스레드에서 실행)"""
+    name = filename.lower()
+    if name.endswith(".gz"):
+        data = gzip.decompress(data)
+        name = name[:-3]
+    text = data.decode("utf-8-sig")
+
+    if name.endswith((".jsonl", ".json")):
+        records = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError:
+                records.append({})
+                continue
+            records.append(obj if isinstance(obj, dict) else {})
+    else:
+        lines = [line for line in csv.reader(text.splitlines()) if line]
+        # 첫 행이 숫자가 아니면 헤더로 취급 (내보내기 파일도 그대로 가져올 수 있음)
+        if lines and not lines[0][0].strip().isdigit():
+            header = [h.strip() for h in lines[0]]
+            records = [dict(zip(header, line)) for line in lines[1:]]
+        else:
+            records = [
+                dict(zip(("discord_id", "roblox_user_id", "roblox_nick"), line))
+                for line in lines
+            ]
+
+    rows: list[tuple[int, Optional[int], Optional[str]]] = []
+    invalid = 0
+    unverified = 0
+    for record in records:
+        verified = record.get("verified")
+        if verified is not None and str(verified).strip().lower() not in ("", "1", "true"):
+            unverified += 1
+            continue
+        try:
+            discord_id = int(record["discord_id"])
+            raw_user_id = str(record.get("roblox_user_id") or "").strip()
+            roblox_user_id = int(raw_user_id) if raw_user_id else None
+            roblox_nick = str(record.get("roblox_nick") or "").strip() or None
+        except (KeyError, TypeError, ValueError):
+            invalid += 1
+            continue
+        if roblox_user_id is None and roblox_nick is None:
+            invalid += 1
+            continue
+        rows.append((discord_id, roblox_user_id, roblox_nick))
+    return rows, invalid, unverified
+
+
+async def assign_roles_in_background(
+    interaction: discord.Interaction, role: discord.Role, discord_ids: list[int]
+) -> None:
+    """가져온 유저들에게 속도 제한을 지키며 인증 역할 부여"""
+    guild = role.guild
+    added = 0
+    failed = 0
+    retry_count = 0
+    for discord_id in discord_ids:
+        member = guild.get_member(discord_id)
+        if member is None or role in member.roles:
+            continue
+        await member_edit_limiter.acquire()
+        try:
+            await apply_member_update(member, add_role=role, reason="인증 데이터 가져오기")
+            added += 1
+        except discord.HTTPException as e:
+            add_error_log(f"import add_roles error (discord_id={discord_id}): {repr(e)}")
+            if enqueue_retry(
+                guild.id,
+                "add_role",
+                discord_id,
+                {"role_id": role.id, "reason": "인증 데이터 가져오기"},
+                e,
+            ):
+                retry_count += 1
+            else:
+                failed += 1
+
+    result_text = f"✅ 역할 부여 완료: {added}명" + (f" (실패 {failed}명)" if failed else "")
+    if retry_count:
+        result_text += f"\n🔁 {retry_count}명은 일시적 오류로 자동 재시도 예정"
+    try:
+        await interaction.followup.send(result_text, ephemeral=True)
+    except discord.HTTPException:
+        # 인터랙션 토큰 만료(15분) 등
+        pass
+
+
+@bot.tree.command(
+    name="데이터가져오기", description="인증된 유저 목록을 파일에서 가져옵니다. (관리자)"
+)
+@app_commands.describe(
+    파일="CSV/JSONL 파일 (discord_id, roblox_user_id[, roblox_nick])",
+    역할부여="가져온 유저에게 인증 역할 부여 여부",
+)
+async def import_users(
+    interaction: discord.Interaction, 파일: discord.Attachment, 역할부여: bool = False
+):
+    if not (is_owner(interaction.user.id) or is_admin(interaction.user)):
+        await interaction.response.send_message("❌ 관리자만 사용할 수 있습니다.", ephemeral=True)
+        return
+
+    guild = interaction.guild
+    if guild is None:
+        await interaction.response.send_message("길드에서만 사용할 수 있습니다.", ephemeral=True)
+        return
+
+    if 파일.size > IMPORT_MAX_BYTES:
+        await interaction.response.send_message(
+            "❌ 파일이 너무 큽니다. (최대 20 MB)", ephemeral=True
+        )
+        return
+
+    role = None
+    if 역할부여:
+        role_id = get_guild_role_id(guild.id)
+        role = guild.get_role(role_id) if role_id else None
+        if role is None:
+            await interaction.response.send_message(
+                "❌ 인증 역할이 설정되지 않았습니다. /설정 명령어를 사용해주세요.",
+                ephemeral=True,
+            )
+            return
+
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    roblox_priority.set("background")
+
+    try:
+        # 최대 20 MB 압축 해제/파싱은 이벤트 루프를 막지 않도록 스레드에서
+        rows, invalid, unverified = await asyncio.to_thread(
+            parse_import_rows, await 파일.read(), 파일.filename
+        )
+    except (OSError, EOFError, zlib.error, UnicodeDecodeError, csv.Error) as e:
+        await interaction.followup.send(f"❌ 파일을 읽을 수 없습니다: {e}", ephemeral=True)
+        return
+
+    if not rows:
+        await interaction.followup.send(
+            "❌ 가져올 수 있는 행이 없습니다."
+            + (f" (미인증 상태 {unverified}개 행 제외)" if unverified else ""),
+            ephemeral=True,
+        )
+        return
+
+    # 로블록스 ID 일괄 검증 (ID가 없는 행은 닉네임으로 ID 조회)
+    names_to_resolve = sorted({nick for _, uid, nick in rows if uid is None})
+    resolved = await roblox_get_user_ids_by_usernames(names_to_resolve) if names_to_resolve else {}
+    if resolved is None:
+        await interaction.followup.send(
+            "❌ 로블록스 닉네임 조회에 실패했습니다. 잠시 후 다시 시도해주세요.", ephemeral=True
+        )
+        return
+
+    candidates: list[tuple[int, int, Optional[str]]] = []
+    for discord_id, roblox_user_id, roblox_nick in rows:
+        if roblox_user_id is None:
+            match = resolved.get(roblox_nick.lower())
+            if match is None:
+                invalid += 1
+                continue
+            roblox_user_id = match[0]
+        candidates.append((discord_id, roblox_user_id, roblox_nick))
+
+    valid_users = await roblox_get_users_by_ids(sorted({uid for _, uid, _ in candidates}))
+    if valid_users is None:
+        await interaction.followup.send(
+            "❌ 로블록스 계정 검증에 실패했습니다. 잠시 후 다시 시도해주세요.", ephemeral=True
+        )
+        return
+
+    now_str = datetime.now().isoformat()
+    upserts = []
+    for discord_id, roblox_user_id, roblox_nick in candidates:
+        name = valid_users.get(roblox_user_id)
+        if name is None:
+            invalid += 1
+            continue
+        upserts.append((discord_id, guild.id, name, roblox_user_id, now_str))
+
+    # 청크 단위 트랜잭션으로 upsert (중간중간 이벤트 루프에 양보)
+    for i in range(0, len(upserts), IMPORT_CHUNK_SIZE):
+        chunk = upserts[i : i + IMPORT_CHUNK_SIZE]
+        cursor.executemany(
+            """INSERT INTO users(discord_id, guild_id, roblox_nick, roblox_user_id,
+               code, expire_time, verified)
+               VALUES(?,?,?,?,NULL,?,1)
+               ON CONFLICT(discord_id, guild_id) DO UPDATE SET
+                   roblox_nick=excluded.roblox_nick,
+                   roblox_user_id=excluded.roblox_user_id,
+                   code=NULL,
+                   expire_time=excluded.expire_time,
+                   verified=1""",
+            chunk,
+        )
+        conn.commit()
+        for discord_id, _, name, _, _ in chunk:
+            nick_index_add(guild.id, discord_id, name)
+        await asyncio.sleep(0)
+
+    cursor.execute("INSERT OR IGNORE INTO stats(guild_id) VALUES(?)", (guild.id,))
+    cursor.execute(
+        "UPDATE stats SET force_count = force_count + ? WHERE guild_id=?",
+        (len(upserts), guild.id),
+    )
+    conn.commit()
+
+    result_text = f"✅ {len(upserts)}명의 인증 데이터를 가져왔습니다."
+    if invalid:
+        result_text += f"\n⚠ {invalid}개 행은 잘못되었거나 로블록스 계정을 찾을 수 없어 건너뛰었습니다."
+    if unverified:
+        result_text += f"\n⚠ {unverified}개 행은 미인증(대기) 상태라 건너뛰었습니다."
+    if role is not None:
+        result_text += "\n⏳ 역할 부여는 백그라운드에서 진행됩니다."
+        spawn_background(
+            assign_roles_in_background(interaction, role, [row[0] for row in upserts])
+        )
+
+    await interaction.followup.send(result_text, ephemeral=True)
+
+
 @bot.tree.command(
     name="데이터초기화", description="모든 봇 데이터를 초기화합니다. (개발자)"
 )
@@ -922,7 +2864,12 @@ async def reset_all_data(interaction: discord.Interaction):
         cursor.execute("DELETE FROM users")
         cursor.execute("DELETE FROM stats")
         cursor.execute("DELETE FROM settings")
+        cursor.execute("DELETE FROM admin_roles")
+        cursor.execute("DELETE FROM retry_queue")
+        forget_identity()
         conn.commit()
+        nick_indexes.clear()
+        admin_role_cache.clear()
         await i.response.edit_message(
             content="✅ 모든 데이터가 삭제되었습니다.", view=None
         )
@@ -999,21 +2946,30 @@ async def announce(
 
     sent_count = 0
     failed_count = 0
+    retry_count = 0
 
     for user_id in user_ids:
         try:
             user = await bot.fetch_user(user_id)
             await user.send(embed=embed)
             sent_count += 1
-        except (discord.Forbidden, discord.NotFound):
-            failed_count += 1
         except Exception as e:
-            print(f"공지 전송 실패 (user_id={user_id}): {repr(e)}")
-            failed_count += 1
+            if not isinstance(e, (discord.Forbidden, discord.NotFound)):
+                command_log.warning(
+                    f"공지 전송 실패: {repr(e)}",
+                    extra={**interaction_log_context(interaction), "user_id": user_id},
+                )
+            # DM 차단(Forbidden) 등은 바로 영구 실패로 기록
+            if enqueue_retry(guild.id, "dm", user_id, {"embed": embed.to_dict()}, e):
+                retry_count += 1
+            else:
+                failed_count += 1
 
     result_text = f"✅ {sent_count}명에게 공지를 전송했습니다."
     if failed_count > 0:
         result_text += f"\n⚠ {failed_count}명에게는 DM 전송에 실패했습니다."
+    if retry_count > 0:
+        result_text += f"\n🔁 {retry_count}명은 일시적 오류로 자동 재시도 예정"
 
     await interaction.followup.send(result_text, ephemeral=True)
 
@@ -1064,36 +3020,123 @@ async def error_log(interaction: discord.Interaction):
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
 
-@bot.tree.command(name="시스템정보", description="봇 시스템 정보를 확인합니다. (개발자)")
-async def system_info(interaction: discord.Interaction):
+@bot.tree.command(name="로그레벨", description="서브시스템별 로그 레벨을 확인/변경합니다. (개발자)")
+@app_commands.describe(
+    대상="로거 이름 (bot/bot.verify/bot.roblox/bot.commands/bot.tasks/discord)",
+    레벨="로그 레벨 (DEBUG/INFO/WARNING/ERROR)",
+)
+async def set_log_level(
+    interaction: discord.Interaction,
+    대상: Optional[str] = None,
+    레벨: Optional[str] = None,
+):
     if not is_owner(interaction.user.id):
         await interaction.response.send_message("❌ 개발자만 사용할 수 있습니다.", ephemeral=True)
         return
 
-    cursor.execute("SELECT COUNT(*) FROM users")
-    total_users = cursor.fetchone()[0]
+    if 대상 is not None and 레벨 is not None:
+        level = 레벨.upper()
+        if 대상 not in LOG_SUBSYSTEMS:
+            await interaction.response.send_message(
+                "❌ 대상은 " + ", ".join(f"'{name}'" for name in LOG_SUBSYSTEMS) + " 중 하나여야 합니다.",
+                ephemeral=True,
+            )
+            return
+        if level not in ("DEBUG", "INFO", "WARNING", "ERROR"):
+            await interaction.response.send_message(
+                "❌ 레벨은 'DEBUG', 'INFO', 'WARNING', 'ERROR' 중 하나여야 합니다.",
+                ephemeral=True,
+            )
+            return
+        logging.getLogger(대상).setLevel(level)
+
+    embed = discord.Embed(title="로그 레벨", color=discord.Color.blurple())
+    for name in LOG_SUBSYSTEMS:
+        embed.add_field(
+            name=name,
+            value=logging.getLevelName(logging.getLogger(name).getEffectiveLevel()),
+            inline=True,
+        )
+
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
 
-    cursor.execute("SELECT COUNT(*) FROM users WHERE verified=1")
-    verified_users = cursor.fetchone()[0]
+@bot.tree.command(name="시스템정보", description="봇 시스템 정보를 확인합니다. (개발자)")
+async def system_info(interaction: discord.Interaction):
+    if not is_owner(interaction.user.id):
+        await interaction.response.send_message("❌ 개발자만 사용할 수 있습니다.", ephemeral=True)
+        return
 
-    cursor.execute("SELECT SUM(verify_count) FROM stats")
-    total_verifications = cursor.fetchone()[0] or 0
+    total_users, verified_users, _, total_verifications = get_guild_counters(0)
 
     embed = discord.Embed(title="시스템 정보", color=discord.Color.blurple())
     embed.add_field(name="총 등록 유저", value=str(total_users), inline=True)
     embed.add_field(name="인증된 유저", value=str(verified_users), inline=True)
     embed.add_field(name="총 인증 횟수", value=str(total_verifications), inline=True)
-    embed.add_field(name="봇 업타임", value="계산 중...", inline=True)
+    embed.add_field(
+        name="봇 업타임", value=format_uptime(time.time() - BOT_START_TIME), inline=True
+    )
     embed.add_field(
         name="DB 파일 크기",
         value=f"{os.path.getsize(DB_PATH) / 1024:.2f} KB",
         inline=True,
     )
+    embed.add_field(
+        name="빈 페이지",
+        value=str(cursor.execute("PRAGMA freelist_count").fetchone()[0]),
+        inline=True,
+    )
     embed.add_field(name="오류 로그 개수", value=str(len(error_logs)), inline=True)
+    embed.add_field(name="속도 프로필", value=f"`{speed_profile_summary()}`", inline=False)
+    lookups, hit_ratio = get_username_cache_hit_ratio()
+    embed.add_field(
+        name="닉네임 캐시",
+        value=f"적중률 {hit_ratio * 100:.1f}% ({lookups}회 조회)\n"
+        f"메모리 {username_cache_stats['memory_hits']} · DB {username_cache_stats['db_hits']} · "
+        f"미스 {username_cache_stats['misses']}",
+        inline=True,
+    )
+    embed.add_field(
+        name="Roblox 요청 대기열",
+        value="\n".join(
+            f"`{name}` 대기 {m['queued']} · 처리 {m['served']} · "
+            f"평균 {m['avg_wait_ms']:.0f} ms · p95 {m['p95_wait_ms']:.0f} ms"
+            for name, m in roblox_limiter.snapshot().items()
+        ),
+        inline=False,
+    )
+    if db_maintenance_last:
+        embed.add_field(
+            name="마지막 DB 유지보수",
+            value=f"<t:{int(db_maintenance_last['at'])}:R> · "
+            f"대기 행 {db_maintenance_last['pruned']}개 삭제, "
+            f"{db_maintenance_last['reclaimed_pages']}페이지 회수",
+            inline=False,
+        )
 
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
 
+STATUS_OPTIONS = {
+    "준비중": {
+        "emoji": "🟠",
+        "color": discord.Color.orange(),
+        "text": "서비스 준비중",
+    },
+    "정상": {
+        "emoji": "🟢",
+        "color": discord.Color.green(),
+        "text": "정상 작동",
+    },
+    "중지": {"emoji": "🔴", "color": discord.Color.red(), "text": "중지 상태"},
+    "오류수정중": {
+        "emoji": "🟥",
+        "color": discord.Color.red(),
+        "text": "오류 수정중",
+    },
+}
+
+
 @bot.tree.command(name="봇상태", description="봇의 상태를 변경합니다. (개발자)")
 @app_commands.describe(상태="상태 선택 (준비중/정상/중지/오류수정중)")
 async def bot_status(interaction: discord.Interaction, 상태: str):
@@ -1101,35 +3144,15 @@ async def bot_status(interaction: discord.Interaction, 상태: str):
         await interaction.response.send_message("❌ 개발자만 사용할 수 있습니다.", ephemeral=True)
         return
 
-    상태_옵션 = {
-        "준비중": {
-            "emoji": "🟠",
-            "color": discord.Color.orange(),
-            "text": "서비스 준비중",
-        },
-        "정상": {
-            "emoji": "🟢",
-            "color": discord.Color.green(),
-            "text": "정상 작동",
-        },
-        "중지": {"emoji": "🔴", "color": discord.Color.red(), "text": "중지 상태"},
-        "오류수정중": {
-            "emoji": "🟥",
-            "color": discord.Color.red(),
-            "text": "오류 수정중",
-        },
-    }
-
-    if 상태 not in 상태_옵션:
+    if 상태 not in STATUS_OPTIONS:
         await interaction.response.send_message(
             "❌ 상태는 '준비중', '정상', '중지', '오류수정중' 중 하나여야 합니다.",
             ephemeral=True,
         )
         return
 
-    상태_정보 = 상태_옵션[상태]
+    상태_정보 = STATUS_OPTIONS[상태]
     emoji = 상태_정보["emoji"]
-    color = 상태_정보["color"]
     text = 상태_정보["text"]
 
     await bot.change_presence(activity=discord.Game(f"{emoji} {text}"))
@@ -1139,44 +3162,21 @@ async def bot_status(interaction: discord.Interaction, 상태: str):
     )
     conn.commit()
 
-    embed = discord.Embed(
-        title=f"{emoji} 봇 상태",
-        description=f"**{text}**",
-        color=color,
-        timestamp=datetime.now(timezone.utc),
-    )
-    embed.add_field(name="상태", value=상태, inline=True)
-    embed.add_field(
-        name="변경 시간", value=datetime.now().strftime("%Y-%m-%d %H:%M:%S"), inline=True
-    )
-    embed.set_footer(text="상태 채널")
+    # 상태 채널 메시지는 대시보드 태스크가 제자리에서 수정
+    mark_status_dirty()
 
     status_channel_id = get_guild_status_channel_id(interaction.guild.id)
-    if status_channel_id:
-        status_channel = interaction.guild.get_channel(status_channel_id)
-        if status_channel:
-            try:
-                async for msg in status_channel.history(limit=1):
-                    if msg.author == bot.user:
-                        await msg.delete()
-
-                await status_channel.send(embed=embed)
-            except discord.Forbidden:
-                await interaction.response.send_message(
-                    "⚠ 상태 채널에 메시지를 보낼 권한이 없습니다.", ephemeral=True
-                )
-                return
-        else:
-            await interaction.response.send_message(
-                "⚠ 상태 채널을 찾을 수 없습니다.", ephemeral=True
-            )
-            return
-    else:
+    if not status_channel_id:
         await interaction.response.send_message(
             "⚠ 상태 채널이 설정되지 않았습니다. /상태채널설정을 사용해주세요.",
             ephemeral=True,
         )
         return
+    if interaction.guild.get_channel(status_channel_id) is None:
+        await interaction.response.send_message(
+            "⚠ 상태 채널을 찾을 수 없습니다.", ephemeral=True
+        )
+        return
 
     await interaction.response.send_message(
         f"✅ 봇 상태를 '{text}'로 변경했습니다.", ephemeral=True
@@ -1193,6 +3193,9 @@ async def set_status_channel(interaction: discord.Interaction, 채널: discord.T
         return
 
     set_guild_status_channel_id(interaction.guild.id, 채널.id)
+    # 새 채널에는 대시보드 메시지를 새로 올림
+    set_guild_status_message_id(interaction.guild.id, None)
+    mark_status_dirty(interaction.guild.id)
     await interaction.response.send_message(
         f"✅ 상태 채널을 {채널.mention}로 설정했습니다.", ephemeral=True
     )
@@ -1226,29 +3229,154 @@ async def update_bot_rank(
     )
 
 
+# 14일보다 오래된 메시지는 일괄 삭제가 안 되므로 경계에 약간 여유를 둠
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)
+PURGE_PROGRESS_INTERVAL = 5  # 진행 상황 표시 간격 (초)
+
+# 메시지 삭제 REST 호출용 (오래된 메시지는 한 개씩 지워야 함)
+message_delete_limiter = RateLimiter(rate=1, burst=5)
+
+
+def parse_date_option(value: str) -> datetime:
+    """'YYYY-MM-DD' → UTC 기준 datetime"""
+    return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+
+async def purge_channel_messages(
+    channel: discord.TextChannel,
+    limit: Optional[int],
+    bot_only: bool,
+    before: Optional[datetime],
+    after: Optional[datetime],
+    progress_message: discord.WebhookMessage,
+) -> tuple[int, int]:
+    """history를 순서대로 읽으며 삭제 → (삭제, 실패)
+
+    14일 이내 메시지는 100개씩 일괄 삭제, 그보다 오래된 메시지는 속도 제한을 지키며
+    한 개씩 삭제하고, 메모리에는 최대 100개만 들고 있음
+    """
+    deleted = 0
+    failed = 0
+    batch: list[discord.Message] = []
+    last_progress = time.monotonic()
+
+    def bulk_cutoff() -> datetime:
+        # 삭제가 오래 걸리면 그사이 14일을 넘기는 메시지가 생기므로 매번 다시 계산
+        return discord.utils.utcnow() - BULK_DELETE_MAX_AGE
+
+    async def delete_one(message: discord.Message) -> None:
+        nonlocal deleted, failed
+        await message_delete_limiter.acquire()
+        try:
+            await message.delete()
+            deleted += 1
+        except discord.NotFound:
+            pass
+        except discord.Forbidden:
+            raise
+        except discord.HTTPException as e:
+            failed += 1
+            add_error_log(f"purge delete (message_id={message.id}): {repr(e)}")
+
+    async def flush_batch() -> None:
+        nonlocal deleted, failed
+        cutoff = bulk_cutoff()
+        singles = [m for m in batch if m.created_at <= cutoff]
+        bulk = [m for m in batch if m.created_at > cutoff]
+        batch.clear()
+        if len(bulk) == 1:
+            singles.append(bulk.pop())
+        if bulk:
+            await message_delete_limiter.acquire()
+            try:
+                await channel.delete_messages(bulk)
+                deleted += len(bulk)
+            except discord.Forbidden:
+                raise
+            except discord.HTTPException as e:
+                # 이미 삭제된 메시지나 경계에서 14일을 넘긴 메시지가 섞이면 배치 전체가 실패함
+                failed += len(bulk)
+                add_error_log(f"purge bulk delete ({len(bulk)}개): {repr(e)}")
+        for message in singles:
+            await delete_one(message)
+
+    # 이후 옵션이 있으면 기본값이 오래된 순이므로 최신순을 명시
+    async for message in channel.history(
+        limit=limit, before=before, after=after, oldest_first=False
+    ):
+        if bot_only and message.author != bot.user:
+            continue
+
+        if message.created_at > bulk_cutoff():
+            batch.append(message)
+            if len(batch) == 100:
+                await flush_batch()
+        else:
+            # history는 최신순이므로 여기부터는 모두 오래된 메시지
+            await flush_batch()
+            await delete_one(message)
+
+        if time.monotonic() - last_progress >= PURGE_PROGRESS_INTERVAL:
+            last_progress = time.monotonic()
+            try:
+                await progress_message.edit(content=f"⏳ 삭제 중... {deleted}개 삭제")
+            except discord.HTTPException:
+                pass
+
+    await flush_batch()
+    return deleted, failed
+
+
 @bot.tree.command(
     name="로그지우기", description="로그 채널의 메시지를 삭제합니다. (개발자)"
 )
-@app_commands.describe(채널="삭제할 채널", 개수="삭제할 메시지 개수")
+@app_commands.describe(
+    채널="삭제할 채널",
+    개수="확인할 최근 메시지 개수 (0이면 전체)",
+    봇메시지만="봇이 보낸 메시지만 삭제",
+    이전="이 날짜 이전 메시지만 (YYYY-MM-DD)",
+    이후="이 날짜 이후 메시지만 (YYYY-MM-DD)",
+)
 async def clear_logs(
-    interaction: discord.Interaction, 채널: discord.TextChannel, 개수: int = 10
+    interaction: discord.Interaction,
+    채널: discord.TextChannel,
+    개수: int = 10,
+    봇메시지만: bool = False,
+    이전: Optional[str] = None,
+    이후: Optional[str] = None,
 ):
     if not is_owner(interaction.user.id):
         await interaction.response.send_message("❌ 개발자만 사용할 수 있습니다.", ephemeral=True)
         return
 
-    if 개수 > 100:
-        개수 = 100
+    try:
+        before = parse_date_option(이전) if 이전 else None
+        after = parse_date_option(이후) if 이후 else None
+    except ValueError:
+        await interaction.response.send_message(
+            "❌ 날짜는 YYYY-MM-DD 형식으로 입력해주세요.", ephemeral=True
+        )
+        return
 
     await interaction.response.defer(ephemeral=True)
+    progress_message = await interaction.followup.send("⏳ 삭제 중...", ephemeral=True, wait=True)
 
     try:
-        deleted = await 채널.purge(limit=개수)
-        await interaction.followup.send(
-            f"✅ {len(deleted)}개의 메시지를 삭제했습니다.", ephemeral=True
+        deleted, failed = await purge_channel_messages(
+            채널, 개수 if 개수 > 0 else None, 봇메시지만, before, after, progress_message
         )
     except discord.Forbidden:
-        await interaction.followup.send("⚠ 메시지 삭제 권한이 없습니다.", ephemeral=True)
+        await progress_message.edit(content="⚠ 메시지 삭제 권한이 없습니다.")
+        return
+
+    result_text = f"✅ {deleted}개의 메시지를 삭제했습니다."
+    if failed:
+        result_text += f"\n⚠ {failed}개 삭제 실패"
+    try:
+        await progress_message.edit(content=result_text)
+    except discord.HTTPException:
+        # 15분이 지나 인터랙션 토큰이 만료된 경우
+        add_error_log(f"clear_logs 완료 (channel={채널.id}): {result_text}")
 
 
 @bot.tree.command(
@@ -1267,7 +3395,9 @@ async def bulk_unverify(interaction: discord.Interaction):
             return
         cursor.execute("UPDATE users SET verified=0")
         cursor.execute("DELETE FROM stats")
+        forget_identity()
         conn.commit()
+        nick_indexes.clear()
         await i.response.edit_message(
             content="✅ 모든 유저의 인증이 삭제되었습니다.", view=None
         )
@@ -1295,8 +3425,7 @@ async def confirm_action(interaction: discord.Interaction):
         await interaction.response.send_message("❌ 개발자만 사용할 수 있습니다.", ephemeral=True)
         return
 
-    cursor.execute("SELECT COUNT(*) FROM users")
-    user_count = cursor.fetchone()[0]
+    user_count = get_guild_counters(0)[0]
 
     embed = discord.Embed(title="현재 데이터 상태", color=discord.Color.blurple())
     embed.add_field(name="등록된 유저", value=str(user_count), inline=False)
@@ -1328,6 +3457,8 @@ async def bulk_verify(interaction: discord.Interaction):
 
     added = 0
     skipped = 0
+    failed = 0
+    retry_count = 0
     for member in guild.members:
         if member.bot:
             continue
@@ -1335,17 +3466,31 @@ async def bulk_verify(interaction: discord.Interaction):
             skipped += 1
             continue
         try:
-            await member.add_roles(role, reason="일괄인증 명령어")
+            await apply_member_update(member, add_role=role, reason="일괄인증 명령어")
             added += 1
         except Exception as e:
             add_error_log(f"bulk_verify add_roles error: {repr(e)}")
-
-    await interaction.followup.send(
+            if enqueue_retry(
+                guild.id,
+                "add_role",
+                member.id,
+                {"role_id": role.id, "reason": "일괄인증 명령어"},
+                e,
+            ):
+                retry_count += 1
+            else:
+                failed += 1
+
+    result_text = (
         f"✅ 일괄 인증 완료\n"
         f"- 새로 인증된 유저: {added}명\n"
-        f"- 이미 인증되어 스킵: {skipped}명",
-        ephemeral=True,
+        f"- 이미 인증되어 스킵: {skipped}명"
     )
+    if retry_count:
+        result_text += f"\n- 🔁 일시적 오류로 자동 재시도 예정: {retry_count}명"
+    if failed:
+        result_text += f"\n- ⚠ 실패 (권한 부족 등): {failed}명"
+    await interaction.followup.send(result_text, ephemeral=True)
 
 @bot.tree.command(name="확인삭제", description="일괄 인증 삭제 확인 (개발자)")
 async def confirm_unverify(interaction: discord.Interaction):
@@ -1353,8 +3498,7 @@ async def confirm_unverify(interaction: discord.Interaction):
         await interaction.response.send_message("❌ 개발자만 사용할 수 있습니다.", ephemeral=True)
         return
 
-    cursor.execute("SELECT COUNT(*) FROM users WHERE verified=1")
-    verified_count = cursor.fetchone()[0]
+    verified_count = get_guild_counters(0)[1]
 
     embed = discord.Embed(title="현재 인증 상태", color=discord.Color.blurple())
     embed.add_field(name="인증된 유저", value=str(verified_count), inline=False)
@@ -1362,33 +3506,1030 @@ async def confirm_unverify(interaction: discord.Interaction):
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
 
+# ---------- 역할 / DB 재동기화 ----------
+
+
+RECONCILE_PREVIEW_COUNT = 10
+
+
+def compute_role_drift(
+    guild: discord.Guild, role: discord.Role
+) -> tuple[list[discord.Member], list[discord.Member]]:
+    """DB 인증 목록과 역할 보유자를 비교 → (역할 추가 대상, 역할 제거 대상)"""
+    cursor.execute(
+        "SELECT discord_id FROM users WHERE guild_id=? AND verified=1", (guild.id,)
+    )
+    verified_ids = {row[0] for row in cursor.fetchall()}
+    holder_ids = {member.id for member in role.members}
+
+    to_add = [
+        member
+        for member in map(guild.get_member, verified_ids - holder_ids)
+        if member is not None and not member.bot
+    ]
+    to_remove = [
+        member
+        for member in map(guild.get_member, holder_ids - verified_ids)
+        if member is not None and not member.bot
+    ]
+    return to_add, to_remove
+
+
+async def apply_role_drift(
+    role: discord.Role, to_add: list[discord.Member], to_remove: list[discord.Member]
+) -> tuple[int, int]:
+    """속도 제한을 지키며 필요한 역할 추가/제거만 적용 → (성공, 실패)"""
+    done = 0
+    failed = 0
+    for members, adding in ((to_add, True), (to_remove, False)):
+        for member in members:
+            await member_edit_limiter.acquire()
+            try:
+                if adding:
+                    await member.add_roles(role, reason="역할 재동기화")
+                else:
+                    await member.remove_roles(role, reason="역할 재동기화")
+                done += 1
+            except discord.HTTPException as e:
+                failed += 1
+                add_error_log(f"apply_role_drift (discord_id={member.id}): {repr(e)}")
+    return done, failed
+
+
+def get_guild_auto_reconcile(guild_id: int) -> bool:
+    cursor.execute("SELECT auto_reconcile FROM settings WHERE guild_id=?", (guild_id,))
+    row = cursor.fetchone()
+    return bool(row and row[0])
+
+
+def set_guild_auto_reconcile(guild_id: int, enabled: bool) -> None:
+    cursor.execute(
+        """INSERT INTO settings(guild_id, auto_reconcile)
+           VALUES(?, ?)
+           ON CONFLICT(guild_id) DO UPDATE SET auto_reconcile=excluded.auto_reconcile""",
+        (guild_id, int(enabled)),
+    )
+    conn.commit()
+
+
+@bot.tree.command(
+    name="재동기화", description="인증 역할과 DB 인증 정보를 비교해 맞춥니다. (관리자)"
+)
+async def reconcile_roles(interaction: discord.Interaction):
+    if not (is_owner(interaction.user.id) or is_admin(interaction.user)):
+        await interaction.response.send_message("❌ 관리자만 사용할 수 있습니다.", ephemeral=True)
+        return
+
+    guild = interaction.guild
+    if guild is None:
+        await interaction.response.send_message("길드에서만 사용할 수 있습니다.", ephemeral=True)
+        return
+
+    role_id = get_guild_role_id(guild.id)
+    role = guild.get_role(role_id) if role_id else None
+    if role is None:
+        await interaction.response.send_message(
+            "❌ 인증 역할이 설정되지 않았습니다. /설정 명령어를 사용해주세요.", ephemeral=True
+        )
+        return
+
+    to_add, to_remove = compute_role_drift(guild, role)
+    if not to_add and not to_remove:
+        await interaction.response.send_message(
+            "✅ 역할과 DB가 이미 일치합니다.", ephemeral=True
+        )
+        return
+
+    # 🔻 먼저 변경될 내용만 보여주고 확인 후 적용 (dry-run)
+    embed = discord.Embed(title="역할 재동기화 미리보기", color=discord.Color.orange())
+    for name, members in (("역할 추가 대상", to_add), ("역할 제거 대상", to_remove)):
+        preview = " ".join(m.mention for m in members[:RECONCILE_PREVIEW_COUNT])
+        if len(members) > RECONCILE_PREVIEW_COUNT:
+            preview += f" 외 {len(members) - RECONCILE_PREVIEW_COUNT}명"
+        embed.add_field(name=f"{name} ({len(members)}명)", value=preview or "-", inline=False)
+
+    view = discord.ui.View(timeout=60)
+
+    async def confirm_callback(i: discord.Interaction):
+        if i.user.id != interaction.user.id:
+            await i.response.send_message("❌ 명령어 실행자만 사용할 수 있습니다.", ephemeral=True)
+            return
+        await i.response.edit_message(content="⏳ 재동기화 적용 중...", embed=None, view=None)
+        done, failed = await apply_role_drift(role, to_add, to_remove)
+        result_text = f"✅ 재동기화 완료: {done}건 적용"
+        if failed:
+            result_text += f"\n⚠ {failed}건 실패 (권한 부족 등)"
+        await i.edit_original_response(content=result_text)
+
+    async def cancel_callback(i: discord.Interaction):
+        if i.user.id != interaction.user.id:
+            await i.response.send_message("❌ 명령어 실행자만 사용할 수 있습니다.", ephemeral=True)
+            return
+        await i.response.edit_message(content="❌ 취소되었습니다.", embed=None, view=None)
+
+    confirm_button = discord.ui.Button(label="적용", style=discord.ButtonStyle.danger)
+    cancel_button = discord.ui.Button(label="취소", style=discord.ButtonStyle.secondary)
+    confirm_button.callback = confirm_callback
+    cancel_button.callback = cancel_callback
+    view.add_item(confirm_button)
+    view.add_item(cancel_button)
+
+    await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+
+
+@bot.tree.command(
+    name="자동동기화", description="주기적인 역할 재동기화를 켜거나 끕니다. (관리자)"
+)
+@app_commands.describe(사용="자동 재동기화 사용 여부")
+async def set_auto_reconcile(interaction: discord.Interaction, 사용: bool):
+    if not (is_owner(interaction.user.id) or is_admin(interaction.user)):
+        await interaction.response.send_message("❌ 관리자만 사용할 수 있습니다.", ephemeral=True)
+        return
+
+    set_guild_auto_reconcile(interaction.guild.id, 사용)
+    await interaction.response.send_message(
+        f"✅ 자동 재동기화를 {'켰습니다' if 사용 else '껐습니다'}.", ephemeral=True
+    )
+
+
+# ---------- 상태 대시보드 ----------
+
+
+STATUS_DASHBOARD_INTERVAL = 30  # 대시보드 수정 최소 간격 (초)
+STATUS_DASHBOARD_REFRESH = 300  # 변경이 없어도 이 간격마다 실시간 값 갱신 (초)
+
+# 대시보드를 다시 그려야 하는 길드 (봇 상태처럼 모든 서버에 보이는 변경은 status_dirty_all)
+status_dirty_guilds: set[int] = set()
+status_dirty_all = True
+status_last_refresh = 0.0
+
+
+def mark_status_dirty(guild_id: Optional[int] = None) -> None:
+    """상태가 바뀌었음을 표시, None이면 모든 서버 (실제 수정은 대시보드 태스크가 간격마다 한 번만)"""
+    global status_dirty_all
+    if guild_id is None:
+        status_dirty_all = True
+    else:
+        status_dirty_guilds.add(guild_id)
+
+
+def format_uptime(seconds: float) -> str:
+    minutes, _ = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    return f"{days}일 {hours}시간 {minutes}분"
+
+
+def build_status_embed(guild_id: int) -> discord.Embed:
+    cursor.execute("SELECT status_text FROM bot_status WHERE id=1")
+    row = cursor.fetchone()
+    상태_정보 = STATUS_OPTIONS.get(row[0] if row else "정상", STATUS_OPTIONS["정상"])
+
+    cursor.execute(
+        "SELECT COUNT(*) FROM users WHERE guild_id=? AND verified=0 AND expire_time > ?",
+        (guild_id, datetime.now().isoformat()),
+    )
+    pending_count = cursor.fetchone()[0]
+
+    request_count, error_rate = get_roblox_error_rate()
+    roblox_health = "🟢 정상" if error_rate < 0.1 else "🔴 불안정"
+
+    hour_ago = time.time() - 3600
+    verified_last_hour = sum(1 for ts in verify_timestamps.get(guild_id, ()) if ts >= hour_ago)
+
+    embed = discord.Embed(
+        title=f"{상태_정보['emoji']} 봇 상태",
+        description=f"**{상태_정보['text']}**",
+        color=상태_정보["color"],
+        timestamp=datetime.now(timezone.utc),
+    )
+    latency = bot.latency
+    embed.add_field(
+        name="게이트웨이 지연",
+        value="-" if math.isnan(latency) else f"{round(latency * 1000)} ms",  # 연결 전에는 NaN
+        inline=True,
+    )
+    embed.add_field(name="업타임", value=format_uptime(time.time() - BOT_START_TIME), inline=True)
+    embed.add_field(
+        name="Roblox API",
+        value=f"{roblox_health}\n오류율 {error_rate * 100:.1f}% (최근 10분 {request_count}건)",
+        inline=True,
+    )
+    embed.add_field(name="인증 처리량", value=f"최근 1시간 {verified_last_hour}건", inline=True)
+    embed.add_field(name="대기 중인 인증", value=f"{pending_count}명", inline=True)
+    embed.set_footer(text="상태 채널")
+    return embed
+
+
+async def update_status_dashboard(guild: discord.Guild) -> None:
+    channel_id = get_guild_status_channel_id(guild.id)
+    channel = guild.get_channel(channel_id) if channel_id else None
+    if not isinstance(channel, discord.TextChannel):
+        return
+
+    embed = build_status_embed(guild.id)
+    message_id = get_guild_status_message_id(guild.id)
+    if message_id:
+        try:
+            # 메시지를 다시 불러오지 않고 ID만으로 바로 수정 (REST 1회)
+            await channel.get_partial_message(message_id).edit(embed=embed)
+            return
+        except discord.NotFound:
+            pass
+
+    message = await channel.send(embed=embed)
+    set_guild_status_message_id(guild.id, message.id)
+
+
+@tasks.loop(seconds=STATUS_DASHBOARD_INTERVAL)
+async def status_dashboard():
+    global status_dirty_all, status_last_refresh
+
+    now = time.monotonic()
+    # 변경이 없어도 주기적으로 모든 서버의 실시간 값(지연, 업타임 등) 갱신
+    refresh_all = status_dirty_all or now - status_last_refresh >= STATUS_DASHBOARD_REFRESH
+    if refresh_all:
+        guilds = bot.guilds
+        status_last_refresh = now
+    else:
+        guilds = [g for g in map(bot.get_guild, status_dirty_guilds) if g is not None]
+    status_dirty_all = False
+    status_dirty_guilds.clear()
+
+    for guild in guilds:
+        try:
+            await update_status_dashboard(guild)
+        except discord.HTTPException as e:
+            add_error_log(f"status_dashboard (guild={guild.id}): {repr(e)}")
+
+
+# ---------- 이벤트 루프 지연 감시 ----------
+
+
+LOOP_LAG_INTERVAL = 0.5  # 측정 간격 (초)
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.25"))  # 이보다 늦으면 스택 수집 (초)
+
+loop_lag_samples: deque[float] = deque(maxlen=2000)
+loop_stalls: deque[dict] = deque(maxlen=20)
+loop_stall_offenders: Counter = Counter()
+loop_heartbeat = time.monotonic()
+loop_thread_id: Optional[int] = None
+loop_ref: Optional[asyncio.AbstractEventLoop] = None
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def capture_loop_stack() -> Optional[tuple[str, str, str]]:
+    """이벤트 루프 스레드의 현재 스택 → (실행 중인 명령/태스크, 막힌 위치, 스택 문자열)"""
+    frame = sys._current_frames().get(loop_thread_id)
+    if frame is None:
+        return None
+    stack = traceback.extract_stack(frame)
+
+    # 명령어 콜백 코드 → "/명령어" 이름
+    command_names = {
+        command.callback.__code__: f"/{command.qualified_name}"
+        for command in bot.tree.walk_commands()
+        if isinstance(command, app_commands.Command)
+    }
+    code_by_frame = []
+    f = frame
+    while f is not None:
+        code_by_frame.append(f.f_code)
+        f = f.f_back
+
+    # 1) 스택에 명령어 콜백이 있으면 그 명령어
+    owner = next((command_names[code] for code in code_by_frame if code in command_names), None)
+    # 2) 실행 중인 태스크 이름 (discord.py 이벤트/tasks.loop는 이름에 핸들러가 들어감)
+    if owner is None and loop_ref is not None:
+        task = asyncio.current_task(loop_ref)
+        if task is not None and not task.get_name().startswith("Task-"):
+            owner = task.get_name()
+    # 3) 가장 안쪽의 이 파일 프레임 (가장 바깥은 python bot.py의 <module>이라 쓸모없음)
+    if owner is None:
+        owner = next(
+            (code.co_qualname for code in code_by_frame if code.co_filename == __file__),
+            "알 수 없음",
+        )
+
+    top = stack[-1]
+    location = f"{os.path.basename(top.filename)}:{top.lineno} {top.name}"
+    return owner, location, "".join(traceback.format_list(stack[-12:]))
+
+
+def loop_watchdog() -> None:
+    """보조 스레드: 하트비트가 멈추면 루프 스레드의 스택을 한 번 수집"""
+    captured_for = None
+    while True:
+        time.sleep(LOOP_LAG_INTERVAL / 5)
+        beat = loop_heartbeat
+        stalled = time.monotonic() - beat - LOOP_LAG_INTERVAL
+        if stalled < LOOP_LAG_THRESHOLD or captured_for == beat:
+            continue
+        captured_for = beat
+        try:
+            result = capture_loop_stack()
+        except Exception:
+            continue
+        if result is None:
+            continue
+        owner, location, stack_text = result
+        loop_stall_offenders[(owner, location)] += 1
+        loop_stalls.append(
+            {
+                "time": datetime.now(timezone.utc),
+                "lag": stalled,
+                "owner": owner,
+                "location": location,
+                "stack": stack_text,
+            }
+        )
+        task_log.warning(f"이벤트 루프 지연 {stalled * 1000:.0f} ms: {owner} @ {location}")
+
+
+async def loop_lag_monitor() -> None:
+    global loop_heartbeat, loop_thread_id, loop_ref
+
+    loop_thread_id = threading.get_ident()
+    loop_ref = asyncio.get_running_loop()
+    loop_heartbeat = time.monotonic()
+    threading.Thread(target=loop_watchdog, name="loop-watchdog", daemon=True).start()
+
+    while True:
+        start = time.monotonic()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        now = time.monotonic()
+        loop_lag_samples.append(max(0.0, now - start - LOOP_LAG_INTERVAL))
+        loop_heartbeat = now
+
+
+@bot.tree.command(name="루프지연", description="이벤트 루프 지연 통계를 확인합니다. (개발자)")
+async def loop_lag_report(interaction: discord.Interaction):
+    if not is_owner(interaction.user.id):
+        await interaction.response.send_message("❌ 개발자만 사용할 수 있습니다.", ephemeral=True)
+        return
+
+    samples = sorted(loop_lag_samples)
+    embed = discord.Embed(title="이벤트 루프 지연", color=discord.Color.blurple())
+    for p in (50, 95, 99):
+        embed.add_field(name=f"p{p}", value=f"{percentile(samples, p) * 1000:.1f} ms", inline=True)
+    embed.add_field(
+        name="최대", value=f"{(samples[-1] if samples else 0) * 1000:.1f} ms", inline=True
+    )
+    embed.add_field(name="표본 수", value=str(len(samples)), inline=True)
+    embed.add_field(
+        name="지연 횟수", value=f"{sum(loop_stall_offenders.values())}회", inline=True
+    )
+
+    offenders = "\n".join(
+        f"{count}회 · {owner} @ `{location}`"
+        for (owner, location), count in loop_stall_offenders.most_common(5)
+    )
+    embed.add_field(name="주요 원인", value=offenders or "없음", inline=False)
+
+    if loop_stalls:
+        last = loop_stalls[-1]
+        embed.add_field(
+            name=f"최근 지연 ({last['lag'] * 1000:.0f} ms, {last['time'].strftime('%H:%M:%S')})",
+            value=f"```{last['stack'][-900:]}```",
+            inline=False,
+        )
+
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+# ---------- 프로파일링 ----------
+
+
+PROFILE_SAMPLE_INTERVAL = 0.005  # CPU 샘플링 간격 (초)
+PROFILE_MAX_SECONDS = 120
+
+profiling_lock = asyncio.Lock()
+
+
+def sample_loop_stacks(seconds: float) -> tuple[Counter, int]:
+    """보조 스레드에서 루프 스레드 스택을 주기적으로 샘플링 → (접힌 스택별 횟수, 샘플 수)"""
+    thread_id = loop_thread_id or threading.main_thread().ident
+    stacks: Counter = Counter()
+    samples = 0
+    deadline = time.monotonic() + seconds
+
+    # GIL을 자주 넘기게 해서 루프 스레드가 I/O 대기할 때만 샘플이 찍히는 편향을 줄임
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(PROFILE_SAMPLE_INTERVAL / 10)
+    try:
+        while time.monotonic() < deadline:
+            frame = sys._current_frames().get(thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_qualname}")
+                frame = frame.f_back
+            if names:
+                stacks[";".join(reversed(names))] += 1
+                samples += 1
+            time.sleep(PROFILE_SAMPLE_INTERVAL)
+    finally:
+        sys.setswitchinterval(switch_interval)
+    return stacks, samples
+
+
+async def profile_cpu(seconds: int, top_n: int) -> tuple[discord.Embed, bytes]:
+    stacks, samples = await asyncio.to_thread(sample_loop_stacks, seconds)
+
+    self_counts: Counter = Counter()
+    total_counts: Counter = Counter()
+    for stack, count in stacks.items():
+        names = stack.split(";")
+        self_counts[names[-1]] += count
+        for name in set(names):
+            total_counts[name] += count
+    # 모든 샘플에 들어 있는 루프 진입부 프레임(run_forever 등)은 누적 목록에서 제외
+    for name in [name for name, count in total_counts.items() if count >= samples]:
+        del total_counts[name]
+
+    embed = discord.Embed(
+        title=f"CPU 프로파일 ({seconds}초, 샘플 {samples}개)", color=discord.Color.blurple()
+    )
+    for title, counts in (("자체 시간 상위", self_counts), ("누적 시간 상위", total_counts)):
+        lines = [
+            f"{count / max(samples, 1) * 100:5.1f}% {name}"
+            for name, count in counts.most_common(top_n)
+        ]
+        embed.add_field(
+            name=title, value=f"```{chr(10).join(lines)[:1000] or '-'}```", inline=False
+        )
+
+    # flamegraph.pl / speedscope에서 바로 열 수 있는 접힌 스택 형식
+    collapsed = "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+    return embed, gzip.compress(collapsed.encode("utf-8"))
+
+
+async def profile_memory(seconds: int, top_n: int) -> tuple[discord.Embed, bytes]:
+    tracemalloc.start(10)
+    try:
+        before = tracemalloc.take_snapshot()
+        await asyncio.sleep(seconds)
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    diffs = after.compare_to(before, "lineno")
+    embed = discord.Embed(title=f"메모리 변화 ({seconds}초)", color=discord.Color.blurple())
+    lines = []
+    for stat in diffs[:top_n]:
+        frame = stat.traceback[0]
+        lines.append(
+            f"{stat.size_diff / 1024:+9.1f} KB {os.path.basename(frame.filename)}:{frame.lineno}"
+        )
+    embed.add_field(
+        name="증가량 상위", value=f"```{chr(10).join(lines)[:1000] or '-'}```", inline=False
+    )
+    total_diff = sum(stat.size_diff for stat in diffs)
+    embed.add_field(name="총 변화", value=f"{total_diff / 1024:+.1f} KB", inline=True)
+
+    report = "\n".join(str(stat) for stat in diffs[:500])
+    return embed, gzip.compress(report.encode("utf-8"))
+
+
+@bot.tree.command(name="프로파일", description="CPU/메모리 프로파일을 수집합니다. (개발자)")
+@app_commands.describe(
+    종류="cpu 또는 memory", 초="수집 시간 (초)", 개수="요약에 표시할 항목 수"
+)
+async def run_profiler(
+    interaction: discord.Interaction, 종류: str = "cpu", 초: int = 10, 개수: int = 15
+):
+    if not is_owner(interaction.user.id):
+        await interaction.response.send_message("❌ 개발자만 사용할 수 있습니다.", ephemeral=True)
+        return
+
+    kind = 종류.lower()
+    if kind not in ("cpu", "memory"):
+        await interaction.response.send_message(
+            "❌ 종류는 'cpu', 'memory' 중 하나여야 합니다.", ephemeral=True
+        )
+        return
+    if not (1 <= 초 <= PROFILE_MAX_SECONDS):
+        await interaction.response.send_message(
+            f"❌ 수집 시간은 1~{PROFILE_MAX_SECONDS}초 사이여야 합니다.", ephemeral=True
+        )
+        return
+    if profiling_lock.locked():
+        await interaction.response.send_message(
+            "❌ 이미 프로파일을 수집하는 중입니다.", ephemeral=True
+        )
+        return
+
+    await interaction.response.defer(ephemeral=True, thinking=True)
+
+    async with profiling_lock:
+        if kind == "cpu":
+            embed, data = await profile_cpu(초, max(1, min(개수, 30)))
+            filename = "profile_cpu_{}.collapsed.gz"
+        else:
+            embed, data = await profile_memory(초, max(1, min(개수, 30)))
+            filename = "profile_memory_{}.txt.gz"
+
+    filename = filename.format(datetime.now().strftime("%Y%m%d_%H%M%S"))
+    await interaction.followup.send(
+        embed=embed, file=discord.File(io.BytesIO(data), filename=filename), ephemeral=True
+    )
+
+
+# ---------- 트레이스 내보내기 ----------
+
+
+TRACE_FILE = os.path.join(BASE_DIR, "traces.jsonl")
+TRACE_FILE_MAX_BYTES = 5 * 1024 * 1024
+TRACE_FILE_BACKUPS = 3
+TRACE_EXPORT_INTERVAL = 5  # 초
+
+recent_traces: deque[Trace] = deque(maxlen=500)
+trace_export_buffer: list[dict] = []
+
+
+def finish_trace(trace: Optional[Trace], error: Optional[BaseException] = None) -> None:
+    if trace is None or trace.duration_ms:
+        return
+    trace.duration_ms = (time.perf_counter() - trace.start) * 1000
+    if error is not None:
+        trace.error = repr(error)
+    recent_traces.append(trace)
+    trace_export_buffer.append(
+        {
+            "trace_id": trace.trace_id,
+            "name": trace.name,
+            "started_at": trace.started_at,
+            "duration_ms": round(trace.duration_ms, 3),
+            "error": trace.error,
+            **trace.attrs,
+            "spans": trace.spans,
+        }
+    )
+
+
+@contextlib.contextmanager
+def traced(name: str, **attrs):
+    """명령어 트리를 거치지 않는 인터랙션(버튼 등)용 트레이스"""
+    trace = Trace(name, **attrs)
+    token = current_trace.set(trace)
+    try:
+        yield trace
+    except BaseException as e:
+        finish_trace(trace, e)
+        raise
+    finally:
+        current_trace.reset(token)
+        finish_trace(trace)
+
+
+def write_trace_batch(batch: list[dict]) -> None:
+    """JSONL 파일에 한 번에 기록하고 크기가 넘으면 교체 (스레드에서 실행)"""
+    if os.path.exists(TRACE_FILE) and os.path.getsize(TRACE_FILE) > TRACE_FILE_MAX_BYTES:
+        for i in range(TRACE_FILE_BACKUPS - 1, 0, -1):
+            if os.path.exists(f"{TRACE_FILE}.{i}"):
+                os.replace(f"{TRACE_FILE}.{i}", f"{TRACE_FILE}.{i + 1}")
+        os.replace(TRACE_FILE, f"{TRACE_FILE}.1")
+    with open(TRACE_FILE, "a", encoding="utf-8") as f:
+        f.writelines(json.dumps(entry, ensure_ascii=False) + "\n" for entry in batch)
+
+
+@tasks.loop(seconds=TRACE_EXPORT_INTERVAL)
+async def trace_exporter():
+    if not trace_export_buffer:
+        return
+    batch = trace_export_buffer[:]
+    trace_export_buffer.clear()
+    try:
+        await asyncio.to_thread(write_trace_batch, batch)
+    except OSError as e:
+        add_error_log(f"trace_exporter: {repr(e)}", task_log)
+
+
+@bot.tree.command(name="트레이스", description="최근 느린 요청의 구간별 시간을 확인합니다. (개발자)")
+@app_commands.describe(개수="표시할 트레이스 수")
+async def slow_traces(interaction: discord.Interaction, 개수: int = 5):
+    if not is_owner(interaction.user.id):
+        await interaction.response.send_message("❌ 개발자만 사용할 수 있습니다.", ephemeral=True)
+        return
+
+    slowest = sorted(recent_traces, key=lambda t: t.duration_ms, reverse=True)[
+        : max(1, min(개수, 10))
+    ]
+    if not slowest:
+        await interaction.response.send_message("❌ 기록된 트레이스가 없습니다.", ephemeral=True)
+        return
+
+    embed = discord.Embed(title="느린 요청 트레이스", color=discord.Color.blurple())
+    for trace in slowest:
+        # 같은 이름의 구간은 합쳐서 오래 걸린 순으로 표시
+        totals: Counter = Counter()
+        counts: Counter = Counter()
+        for s in trace.spans:
+            totals[s["name"]] += s["duration_ms"]
+            counts[s["name"]] += 1
+        lines = [
+            f"{ms:8.1f} ms  {name}" + (f" ×{counts[name]}" if counts[name] > 1 else "")
+            for name, ms in totals.most_common(6)
+        ]
+        started = datetime.fromtimestamp(trace.started_at).strftime("%H:%M:%S")
+        embed.add_field(
+            name=f"{trace.name} · {trace.duration_ms:.0f} ms · {started}"
+            + (" · ❌" if trace.error else ""),
+            value=f"```{chr(10).join(lines) or '구간 없음'}```",
+            inline=False,
+        )
+
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+# ---------- 속도 프로필 ----------
+
+
+def speed_profile_summary() -> str:
+    """현재 사용 중인 이벤트 루프 / JSON / DNS 구현"""
+    loop = type(asyncio.get_event_loop_policy()).__module__.split(".")[0]
+    # discord.py는 orjson이 설치돼 있으면 게이트웨이/HTTP JSON에 자동으로 사용
+    discord_json = "orjson" if discord.utils.HAS_ORJSON else "json"
+    roblox_dns = "aiodns" if SPEED_PROFILE and aiodns else "threaded"
+    return (
+        f"loop={loop}, discord_json={discord_json}, "
+        f"roblox_json={json_loads.__module__}, roblox_dns={roblox_dns}"
+    )
+
+
+gateway_record_file = None
+gateway_record_count = 0
+
+
+async def on_socket_raw_receive(msg: str):
+    """게이트웨이 수신 페이로드를 한 줄씩 기록 (bench_speed.py 입력용)"""
+    global gateway_record_file, gateway_record_count
+    if gateway_record_count >= GATEWAY_RECORD_LIMIT:
+        return
+    if gateway_record_file is None:
+        gateway_record_file = open(GATEWAY_RECORD_FILE, "a", encoding="utf-8")
+    gateway_record_file.write(msg + "\n")
+    gateway_record_count += 1
+    if gateway_record_count >= GATEWAY_RECORD_LIMIT:
+        gateway_record_file.close()
+        log.info(f"게이트웨이 기록 완료: {gateway_record_count}개 → {GATEWAY_RECORD_FILE}")
+
+
+if GATEWAY_RECORD_FILE:
+    bot.event(on_socket_raw_receive)
+
+
+# ---------- DB 유지보수 ----------
+
+
+# 만료 후 이 시간이 지난 미인증(대기) 행은 삭제
+PENDING_RETENTION_HOURS = int(os.getenv("PENDING_RETENTION_HOURS", "24"))
+DB_MAINTENANCE_INTERVAL = 6  # 시간
+DB_DELETE_BATCH = 500
+# incremental_vacuum 한 번에 회수할 페이지 수와 최대 반복 횟수 (잠금 시간 제한)
+VACUUM_STEP_PAGES = 256
+VACUUM_MAX_STEPS = 40
+
+db_maintenance_last: dict = {}
+
+
+async def delete_in_batches(sql: str, params: tuple = ()) -> int:
+    """rowid 기준으로 나눠 삭제하고 배치 사이에 이벤트 루프에 양보
+
+    sql은 삭제할 rowid를 고르는 SELECT 문 (LIMIT 없이)"""
+    deleted = 0
+    while True:
+        cursor.execute(
+            f"DELETE FROM users WHERE rowid IN ({sql} LIMIT {DB_DELETE_BATCH})", params
+        )
+        conn.commit()
+        deleted += cursor.rowcount
+        if cursor.rowcount < DB_DELETE_BATCH:
+            return deleted
+        await asyncio.sleep(0)
+
+
+async def prune_pending_rows() -> int:
+    cutoff = datetime.now() - timedelta(hours=PENDING_RETENTION_HOURS)
+    return await delete_in_batches(
+        "SELECT rowid FROM users WHERE verified=0 AND expire_time < ?",
+        (cutoff.isoformat(),),
+    )
+
+
+async def purge_guild_data(guild_id: int) -> None:
+    """봇이 나간 서버의 데이터 삭제"""
+    try:
+        deleted = await delete_in_batches(
+            "SELECT rowid FROM users WHERE guild_id=?", (guild_id,)
+        )
+        for table in ("stats", "settings", "admin_roles", "group_settings", "retry_queue"):
+            cursor.execute(f"DELETE FROM {table} WHERE guild_id=?", (guild_id,))
+        conn.commit()
+    except sqlite3.Error as e:
+        add_error_log(f"purge_guild_data: {repr(e)}", task_log, guild_id=guild_id)
+        return
+
+    nick_indexes.pop(guild_id, None)
+    admin_role_cache.pop(guild_id, None)
+    verify_timestamps.pop(guild_id, None)
+    task_log.info(f"탈퇴한 서버 데이터 삭제: users {deleted}행", extra={"guild_id": guild_id})
+
+
+async def incremental_vacuum() -> int:
+    """빈 페이지를 VACUUM_STEP_PAGES씩 회수하고 그 사이에 양보"""
+    start_free = free = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+    for _ in range(VACUUM_MAX_STEPS):
+        if free == 0:
+            break
+        # execute()는 한 단계만 실행해 1페이지만 회수되므로 executescript로 끝까지 실행
+        cursor.executescript(f"PRAGMA incremental_vacuum({VACUUM_STEP_PAGES})")
+        free = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+        await asyncio.sleep(0)
+    return start_free - free
+
+
+async def run_db_maintenance() -> dict:
+    start = time.perf_counter()
+    size_before = os.path.getsize(DB_PATH)
+
+    pruned = await prune_pending_rows()
+    cursor.execute(
+        "DELETE FROM roblox_usernames WHERE fetched_at < ?", (time.time() - USERNAME_CACHE_TTL,)
+    )
+    conn.commit()
+    dead_retries = prune_dead_retries()
+    cursor.execute("PRAGMA optimize")
+    reclaimed = await incremental_vacuum()
+
+    db_maintenance_last.update(
+        at=time.time(),
+        pruned=pruned,
+        dead_retries=dead_retries,
+        reclaimed_pages=reclaimed,
+        size_before=size_before,
+        size_after=os.path.getsize(DB_PATH),
+        duration_ms=(time.perf_counter() - start) * 1000,
+    )
+    # JsonLogFormatter는 LOG_CONTEXT_FIELDS만 출력하므로 수치는 메시지에 포함
+    task_log.info(
+        f"DB 유지보수 완료 ({db_maintenance_last['duration_ms']:.0f} ms): "
+        f"대기 행 {pruned}개, 재시도 실패 항목 {dead_retries}개 삭제, {reclaimed}페이지 회수, "
+        f"{size_before / 1024:.0f} KB → {db_maintenance_last['size_after'] / 1024:.0f} KB"
+    )
+    return db_maintenance_last
+
+
+@tasks.loop(hours=DB_MAINTENANCE_INTERVAL)
+async def db_maintenance():
+    try:
+        await run_db_maintenance()
+    except sqlite3.Error as e:
+        add_error_log(f"db_maintenance: {repr(e)}", task_log)
+
+
+@bot.event
+async def on_guild_remove(guild: discord.Guild):
+    spawn_background(purge_guild_data(guild.id))
+
+
+@bot.tree.command(name="db정리", description="DB 유지보수를 바로 실행합니다. (개발자)")
+async def db_maintenance_now(interaction: discord.Interaction):
+    if not is_owner(interaction.user.id):
+        await interaction.response.send_message("❌ 개발자만 사용할 수 있습니다.", ephemeral=True)
+        return
+
+    await interaction.response.defer(ephemeral=True)
+    try:
+        result = await run_db_maintenance()
+    except sqlite3.Error as e:
+        add_error_log(f"/db정리: {repr(e)}", command_log)
+        await interaction.followup.send(f"❌ DB 유지보수 실패: {e}", ephemeral=True)
+        return
+
+    await interaction.followup.send(
+        f"✅ DB 유지보수 완료 ({result['duration_ms']:.0f} ms)\n"
+        f"만료 대기 행 삭제: {result['pruned']}개\n"
+        f"오래된 재시도 실패 항목 삭제: {result['dead_retries']}개\n"
+        f"회수한 페이지: {result['reclaimed_pages']}개\n"
+        f"파일 크기: {result['size_before'] / 1024:.2f} KB → {result['size_after'] / 1024:.2f} KB",
+        ephemeral=True,
+    )
+
+
+@bot.tree.command(name="느린쿼리", description="DB 쿼리별 실행 시간 통계를 확인합니다. (개발자)")
+@app_commands.describe(개수="표시할 쿼리 수", 초기화="통계와 실행 계획 기록 초기화")
+async def slow_queries(interaction: discord.Interaction, 개수: int = 8, 초기화: bool = False):
+    if not is_owner(interaction.user.id):
+        await interaction.response.send_message("❌ 개발자만 사용할 수 있습니다.", ephemeral=True)
+        return
+
+    if 초기화:
+        query_stats.clear()
+        query_plans.clear()
+        await interaction.response.send_message("✅ 쿼리 통계를 초기화했습니다.", ephemeral=True)
+        return
+
+    top = sorted(query_stats.items(), key=lambda item: item[1][1], reverse=True)[
+        : max(1, min(개수, 10))
+    ]
+    if not top:
+        await interaction.response.send_message("❌ 기록된 쿼리가 없습니다.", ephemeral=True)
+        return
+
+    embed = discord.Embed(
+        title="느린 쿼리 (총 시간 순)",
+        description=f"기준 {SLOW_QUERY_MS:.0f} ms 이상이면 실행 계획 기록",
+        color=discord.Color.blurple(),
+    )
+    for shape, (count, total, worst) in top:
+        plan, full_scan = query_plans.get(shape, (None, False))
+        value = f"```sql\n{shape[:300]}```"
+        if plan:
+            value += f"```{chr(10).join(plan)[:300]}```"
+        embed.add_field(
+            name=f"{total * 1000:.0f} ms · {count}회 · 평균 {total / count * 1000:.2f} ms · "
+            f"최대 {worst * 1000:.1f} ms" + (" · ⚠ 전체 스캔" if full_scan else ""),
+            value=value,
+            inline=False,
+        )
+
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
 # ---------- 태스크 / 이벤트 ----------
 
 
+# 자동 재동기화에서 역할 보유자의 이 비율 이상을 제거해야 하면 DB 이상으로 보고 제거를 건너뜀
+AUTO_RECONCILE_MAX_REMOVE_RATIO = 0.5
+
+
 @tasks.loop(minutes=5)
 async def auto_sync():
-    print("자동 동기화 완료")
+    for guild in bot.guilds:
+        if not get_guild_auto_reconcile(guild.id):
+            continue
+        role_id = get_guild_role_id(guild.id)
+        role = guild.get_role(role_id) if role_id else None
+        if role is None:
+            continue
+
+        try:
+            to_add, to_remove = compute_role_drift(guild, role)
+            if len(to_remove) > len(role.members) * AUTO_RECONCILE_MAX_REMOVE_RATIO:
+                add_error_log(
+                    f"auto_sync: guild={guild.id} 제거 대상 {len(to_remove)}명이 너무 많아 제거를 건너뜀"
+                )
+                to_remove = []
+            if to_add or to_remove:
+                await apply_role_drift(role, to_add, to_remove)
+        except Exception as e:
+            add_error_log(f"auto_sync: {repr(e)}", task_log, guild_id=guild.id)
+
+    task_log.debug("자동 동기화 완료")
+
+
+@bot.event
+async def on_member_join(member: discord.Member):
+    """인증 기록이 있는 유저가 다시 들어오면 역할과 닉네임 복구"""
+    if member.bot:
+        return
+
+    guild = member.guild
+    index = get_nick_index(guild.id)
+    if member.id not in index:
+        return
+
+    role_id = get_guild_role_id(guild.id)
+    role = guild.get_role(role_id) if role_id else None
+    if role is None:
+        return
+
+    cursor.execute(
+        """SELECT roblox_user_id, rank_name, rank_group_id FROM users
+           WHERE discord_id=? AND guild_id=?""",
+        (member.id, guild.id),
+    )
+    roblox_user_id, rank_name, rank_group_id = cursor.fetchone() or (None, None, None)
+
+    # 메모리 캐시나 users에 저장된 마지막 랭크가 있으면 로블록스 API 호출 없이 복구
+    group_id = get_guild_group_id(guild.id) or DEFAULT_GROUP_ID
+    if rank_group_id != group_id:
+        rank_name = None
+        if roblox_user_id:
+            rank_name = await get_rank_name(roblox_user_id, group_id)
+            if get_cached_rank(roblox_user_id, group_id)[0]:
+                save_member_rank(guild.id, member.id, group_id, rank_name)
+                conn.commit()
+    elif roblox_user_id:
+        hit, cached_rank = get_cached_rank(roblox_user_id, group_id)
+        if hit:
+            rank_name = cached_rank  # 메모리 캐시가 더 최근 값
+
+    try:
+        await apply_member_update(
+            member,
+            add_role=role,
+            nick=format_verified_nick(index.by_id[member.id], rank_name),
+            reason="인증 유저 재입장",
+        )
+    except discord.HTTPException as e:
+        add_error_log(f"on_member_join restore (discord_id={member.id}): {repr(e)}")
+
+
+# ---------- setup_hook / on_ready / 자동 동기화 ----------
+
+
+@bot.event
+async def setup_hook():
+    # 영구 인증 버튼 등록 (재시작 전에 보낸 DM 버튼도 계속 동작)
+    bot.add_dynamic_items(VerifyButton)
+    spawn_background(loop_lag_monitor())
+
+    # 디스코드 REST 호출을 현재 트레이스의 구간으로 기록
+    http_request = bot.http.request
+
+    async def traced_http_request(route, **kwargs):
+        with span(f"discord {route.method} {route.path}"):
+            return await http_request(route, **kwargs)
+
+    bot.http.request = traced_http_request
+
+    # 종료할 때 Roblox 공용 세션도 닫기
+    bot_close = bot.close
+
+    async def close():
+        if roblox_session is not None and not roblox_session.closed:
+            await roblox_session.close()
+        await bot_close()
+
+    bot.close = close
 
-# ---------- on_ready / 자동 동기화 ----------
 
 @bot.event
 async def on_ready():
-    print("on_ready 호출")
-    print("tree commands count:", len(bot.tree.get_commands()))
+    log.info("on_ready 호출")
+    log.info(f"tree commands count: {len(bot.tree.get_commands())}")
 
     try:
         # 🔹 전체 글로벌 동기화
         synced = await bot.tree.sync()
-        print(f"글로벌 동기화된 명령어 수: {len(synced)}")
+        log.info(f"글로벌 동기화된 명령어 수: {len(synced)}")
     except Exception as e:
-        print(f"글로벌 sync 실패: {e!r}")
+        log.error(f"글로벌 sync 실패: {e!r}")
         synced = []
 
-    print(f"봇 실행 완료: {bot.user} (ID: {bot.user.id}), 총 동기화 명령어 수: {len(synced)}")
-    print("자동 동기화 완료")
+    if not auto_sync.is_running():
+        auto_sync.start()
+    if not status_dashboard.is_running():
+        status_dashboard.start()
+    if not trace_exporter.is_running():
+        trace_exporter.start()
+    if not db_maintenance.is_running():
+        db_maintenance.start()
+    if not retry_worker.is_running():
+        retry_worker.start()
+
+    log.info(f"봇 실행 완료: {bot.user} (ID: {bot.user.id}), 총 동기화 명령어 수: {len(synced)}")
+
+
+@bot.event
+async def on_app_command_completion(
+    interaction: discord.Interaction, command: app_commands.Command
+):
+    latency_ms = (discord.utils.utcnow() - interaction.created_at).total_seconds() * 1000
+    command_log.info(
+        "명령어 완료",
+        extra={**interaction_log_context(interaction), "latency_ms": round(latency_ms, 1)},
+    )
+    finish_trace(interaction.extras.get("trace"))
+
+
+@bot.tree.error
+async def on_app_command_error(
+    interaction: discord.Interaction, error: app_commands.AppCommandError
+):
+    finish_trace(interaction.extras.get("trace"), error)
+    command_log.error(
+        f"명령어 오류: {error!r}",
+        exc_info=error,
+        extra=interaction_log_context(interaction),
+    )
 
 
 # ---------- 봇 실행 ----------
 
 if __name__ == "__main__":
-    bot.run(TOKEN)
+    setup_logging()
+    log.info(migration_summary)
+    if SPEED_PROFILE and uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    log.info(f"속도 프로필: {speed_profile_summary()}")
+    # discord.py 기본 로그 핸들러 대신 위의 큐 기반 설정 사용
+    bot.run(TOKEN, log_handler=None)
@@ -0,0 +1,413 @@
+"""명령어 핸들러 오프라인 부하 테스트
+
+실제 디스코드 연결 없이 bot.py의 명령어 핸들러를 가짜 Interaction/Member/Guild로 호출함.
+로블록스 API는 로컬 가짜 서버로 대체하고, 유저 N명이 들어 있는 임시 DB를 사용함.
+
+    python loadtest.py --users 50000 --requests 5000 --concurrency 50
+    python loadtest.py --mix verify=1 --roblox-latency 80 --discord-latency 40
+
+처리량, 핸들러별 p50/p99 지연, 이벤트 루프 지연, 최대 RSS를 출력함.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="명령어 핸들러 오프라인 부하 테스트")
+    parser.add_argument("--users", type=int, default=10000, help="DB에 미리 넣을 인증 유저 수")
+    parser.add_argument("--guilds", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=2000, help="실행할 작업 수")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument(
+        "--mix",
+        default="verify=4,user_search=2,stats=2,server_info=2",
+        help="작업 비율 (verify는 /인증 + 인증 버튼)",
+    )
+    parser.add_argument("--roblox-latency", type=float, default=50, help="가짜 로블록스 응답 지연 (ms)")
+    parser.add_argument("--discord-latency", type=float, default=30, help="가짜 디스코드 REST 지연 (ms)")
+    parser.add_argument("--roblox-rate", type=float, default=1_000_000, help="Roblox 요청 속도 제한 (초당)")
+    parser.add_argument("--db", help="DB 파일 경로 (기본: 임시 파일)")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args()
+
+
+args = parse_args()
+random.seed(args.seed)
+
+# bot.py는 임포트할 때 DB를 열고 설정을 읽으므로 먼저 환경 변수 지정
+workdir = tempfile.mkdtemp(prefix="loadtest-")
+os.environ["DB_PATH"] = args.db or os.path.join(workdir, "bot.db")
+os.environ["ROBLOX_RATE"] = str(args.roblox_rate)
+os.environ["ROBLOX_BURST"] = str(max(1, int(args.roblox_rate)))
+os.environ.setdefault("DISCORD_TOKEN", "loadtest")
+
+from aiohttp import web  # noqa: E402
+import discord  # noqa: E402
+
+import bot  # noqa: E402
+
+
+DISCORD_LATENCY = args.discord_latency / 1000
+ROBLOX_LATENCY = args.roblox_latency / 1000
+GROUP_ID = bot.DEFAULT_GROUP_ID
+
+
+# ---------- 가짜 로블록스 서버 ----------
+
+
+def roblox_id(name: str) -> int:
+    return 1_000_000 + int(name.removeprefix("player"))
+
+
+# user_id → 프로필 설명 (/인증 후 발급된 코드를 넣어 둠)
+descriptions: dict[int, str] = {}
+
+
+async def fake_usernames(request: web.Request) -> web.Response:
+    await asyncio.sleep(ROBLOX_LATENCY)
+    body = await request.json()
+    return web.json_response(
+        {
+            "data": [
+                {"requestedUsername": n, "name": n, "id": roblox_id(n)}
+                for n in body["usernames"]
+            ]
+        }
+    )
+
+
+async def fake_user(request: web.Request) -> web.Response:
+    await asyncio.sleep(ROBLOX_LATENCY)
+    user_id = int(request.match_info["user_id"])
+    return web.json_response(
+        {
+            "id": user_id,
+            "name": f"player{user_id - 1_000_000}",
+            "description": descriptions.get(user_id, ""),
+        }
+    )
+
+
+async def fake_users_batch(request: web.Request) -> web.Response:
+    await asyncio.sleep(ROBLOX_LATENCY)
+    body = await request.json()
+    return web.json_response(
+        {"data": [{"id": i, "name": f"player{i - 1_000_000}"} for i in body["userIds"]]}
+    )
+
+
+async def fake_group_roles(request: web.Request) -> web.Response:
+    await asyncio.sleep(ROBLOX_LATENCY)
+    return web.json_response(
+        {"data": [{"group": {"id": GROUP_ID}, "role": {"name": "Member", "rank": 1}}]}
+    )
+
+
+async def start_fake_roblox() -> web.AppRunner:
+    app = web.Application()
+    app.add_routes(
+        [
+            web.post("/v1/usernames/users", fake_usernames),
+            web.get("/v1/users/{user_id}", fake_user),
+            web.post("/v1/users", fake_users_batch),
+            web.get("/v1/users/{user_id}/groups/roles", fake_group_roles),
+        ]
+    )
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    bot.ROBLOX_USERNAME_API = f"{base}/v1/usernames/users"
+    bot.ROBLOX_USER_API = base + "/v1/users/{userId}"
+    bot.ROBLOX_USERS_BATCH_API = f"{base}/v1/users"
+    bot.ROBLOX_GROUP_ROLES_API = base + "/v1/users/{userId}/groups/roles"
+    return runner
+
+
+# ---------- 가짜 디스코드 객체 ----------
+
+
+async def discord_call() -> None:
+    await asyncio.sleep(DISCORD_LATENCY)
+
+
+class FakeRole:
+    def __init__(self, role_id: int, name: str, position: int):
+        self.id = role_id
+        self.name = name
+        self.position = position
+        self.mention = f"<@&{role_id}>"
+
+    def __lt__(self, other: "FakeRole") -> bool:
+        return self.position < other.position
+
+    def __ge__(self, other: "FakeRole") -> bool:
+        return self.position >= other.position
+
+
+class FakeMember:
+    def __init__(self, guild: "FakeGuild", member_id: int, admin: bool = False):
+        self.id = member_id
+        self.guild = guild
+        self.bot = False
+        self.name = self.display_name = f"member{member_id}"
+        self.mention = f"<@{member_id}>"
+        self.nick = None
+        self.roles = [guild.default_role]
+        self.guild_permissions = discord.Permissions(administrator=admin, manage_nicknames=admin)
+        self.dm_view = None
+
+    @property
+    def top_role(self) -> FakeRole:
+        return max(self.roles)
+
+    async def send(self, *args, view=None, **kwargs) -> None:
+        await discord_call()
+        self.dm_view = view
+
+    async def add_roles(self, *roles, reason=None) -> None:
+        await discord_call()
+        self.roles.extend(r for r in roles if r not in self.roles)
+
+    async def edit(self, *, roles=None, nick=None, reason=None) -> None:
+        await discord_call()
+        if roles is not None:
+            self.roles = [self.guild.default_role, *roles]
+        if nick is not None:
+            self.nick = nick
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.name = f"guild{guild_id}"
+        self.owner_id = 0
+        self.default_role = FakeRole(guild_id, "@everyone", 0)
+        self.verified_role = FakeRole(guild_id + 1, "인증", 1)
+        self.roles = {r.id: r for r in (self.default_role, self.verified_role)}
+        self.members: dict[int, FakeMember] = {}
+        self.me = FakeMember(self, 1, admin=True)
+        self.me.roles.append(FakeRole(guild_id + 2, "bot", 10))
+
+    @property
+    def member_count(self) -> int:
+        return len(self.members)
+
+    def get_role(self, role_id: int):
+        return self.roles.get(role_id)
+
+    def get_member(self, member_id: int):
+        return self.members.get(member_id)
+
+    def get_member_named(self, name: str):
+        return None
+
+    def member(self, member_id: int, admin: bool = False) -> FakeMember:
+        if member_id not in self.members:
+            self.members[member_id] = FakeMember(self, member_id, admin)
+        return self.members[member_id]
+
+
+class FakeResponse:
+    def __init__(self):
+        self.done = False
+
+    def is_done(self) -> bool:
+        return self.done
+
+    async def defer(self, **kwargs) -> None:
+        await discord_call()
+        self.done = True
+
+    async def send_message(self, *args, **kwargs) -> None:
+        await discord_call()
+        self.done = True
+
+
+class FakeFollowup:
+    async def send(self, *args, **kwargs) -> None:
+        await discord_call()
+
+
+class FakeInteraction:
+    def __init__(self, guild: FakeGuild, user: FakeMember, name: str):
+        self.guild = guild
+        self.guild_id = guild.id
+        self.user = user
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+        self.extras: dict = {}
+        self.created_at = discord.utils.utcnow()
+        self.type = discord.InteractionType.application_command
+        self.data = {"name": name}
+        self.command = None
+
+
+# ---------- 시나리오 ----------
+
+
+def seed_db(guilds: list[FakeGuild], users: int) -> None:
+    """인증 완료 유저 N명을 길드에 나눠서 저장"""
+    now = time.time()
+    for guild in guilds:
+        bot.set_guild_role_id(guild.id, guild.verified_role.id)
+        bot.set_guild_group_id(guild.id, GROUP_ID)
+    rows = []
+    for i in range(users):
+        guild = guilds[i % len(guilds)]
+        rows.append((10_000 + i, guild.id, f"player{i}", roblox_id(f"player{i}"), None, None))
+    bot.cursor.executemany(
+        """INSERT OR IGNORE INTO users(discord_id, guild_id, roblox_nick, roblox_user_id,
+           code, expire_time, verified) VALUES(?,?,?,?,?,?,1)""",
+        rows,
+    )
+    bot.conn.commit()
+    print(f"DB 준비: 유저 {users}명 ({time.time() - now:.1f}초) → {bot.DB_PATH}")
+
+
+class Scenario:
+    def __init__(self, guilds: list[FakeGuild], users: int):
+        self.guilds = guilds
+        self.next_new_user = 10_000 + users  # 아직 인증하지 않은 유저 ID
+        self.users = users
+
+    async def verify(self) -> None:
+        """/인증 → 프로필에 코드 입력 → 인증 버튼"""
+        guild = random.choice(self.guilds)
+        discord_id = self.next_new_user
+        self.next_new_user += 1
+        member = guild.member(discord_id)
+        nick = f"player{discord_id - 10_000}"
+
+        await bot.verify.callback(FakeInteraction(guild, member, "인증"), 로블닉=nick)
+        if member.dm_view is None:
+            raise RuntimeError("인증 DM이 전송되지 않음")
+        button = member.dm_view.children[0]
+        descriptions[roblox_id(nick)] = f"코드: {button.code}"
+
+        await button.callback(FakeInteraction(guild, member, "인증하기"))
+        if guild.verified_role not in member.roles:
+            raise RuntimeError("인증 역할이 부여되지 않음")
+
+    async def user_search(self) -> None:
+        guild = random.choice(self.guilds)
+        admin = guild.member(2, admin=True)
+        keyword = f"player{random.randrange(self.users)}"[: random.randint(7, 10)]
+        await bot.user_search.callback(FakeInteraction(guild, admin, "유저검색"), 검색어=keyword)
+
+    async def stats(self) -> None:
+        guild = random.choice(self.guilds)
+        await bot.stats.callback(FakeInteraction(guild, guild.member(3), "통계"))
+
+    async def server_info(self) -> None:
+        guild = random.choice(self.guilds)
+        await bot.server_info.callback(FakeInteraction(guild, guild.member(3), "서버정보"))
+
+
+def parse_mix(mix: str) -> tuple[list[str], list[float]]:
+    names, weights = [], []
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        names.append(name.strip())
+        weights.append(float(weight or 1))
+    return names, weights
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else 0.0
+
+
+async def measure_loop_lag(samples: list[float], stop: asyncio.Event) -> None:
+    interval = 0.05
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - start - interval))
+
+
+async def main() -> None:
+    guilds = [FakeGuild(900_000 + i * 10) for i in range(args.guilds)]
+    bot.bot.get_guild = {g.id: g for g in guilds}.get  # 인증 버튼이 길드를 찾을 때 사용
+    seed_db(guilds, args.users)
+    runner = await start_fake_roblox()
+
+    scenario = Scenario(guilds, args.users)
+    names, weights = parse_mix(args.mix)
+    for name in names:
+        if not hasattr(scenario, name):
+            sys.exit(f"알 수 없는 작업: {name}")
+    plan = random.choices(names, weights=weights, k=args.requests)
+
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    lag_samples: list[float] = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(lag_samples, stop))
+
+    async def worker() -> None:
+        while plan:
+            name = plan.pop()
+            start = time.perf_counter()
+            try:
+                await getattr(scenario, name)()
+            except Exception as e:
+                errors[name] += 1
+                if errors[name] == 1:
+                    print(f"⚠ {name} 실패: {e!r}")
+            latencies[name].append(time.perf_counter() - start)
+            # 트레이스 내보내기 루프 대신 버퍼 비우기 (메모리 측정 왜곡 방지)
+            bot.trace_export_buffer.clear()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await lag_task
+
+    if bot.roblox_session is not None:
+        await bot.roblox_session.close()
+    await runner.cleanup()
+
+    total = sum(len(v) for v in latencies.values())
+    print(
+        f"\n작업 {total}개 / {elapsed:.2f}초 → {total / elapsed:.1f} ops/s "
+        f"(동시 {args.concurrency}, 로블록스 {args.roblox_latency:.0f} ms, "
+        f"디스코드 {args.discord_latency:.0f} ms)\n"
+    )
+    print(f"{'handler':<12} {'count':>7} {'errors':>7} {'p50 ms':>9} {'p99 ms':>9}")
+    for name in names:
+        values = latencies[name]
+        print(
+            f"{name:<12} {len(values):>7} {errors[name]:>7} "
+            f"{percentile(values, 50) * 1000:>9.1f} {percentile(values, 99) * 1000:>9.1f}"
+        )
+    print(
+        f"\n이벤트 루프 지연: p50 {percentile(lag_samples, 50) * 1000:.1f} ms, "
+        f"p99 {percentile(lag_samples, 99) * 1000:.1f} ms, "
+        f"최대 {max(lag_samples, default=0) * 1000:.1f} ms"
+    )
+    # 리눅스에서 ru_maxrss 단위는 KB (macOS는 바이트)
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_rss //= 1024
+    print(f"최대 RSS: {peak_rss / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    finally:
+        bot.conn.close()
+        shutil.rmtree(workdir, ignore_errors=True)